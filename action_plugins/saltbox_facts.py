@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import stat
+import sys
+from typing import Any
+
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.plugins.action import ActionBase
+
+_MODULE_UTILS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'module_utils')
+if _MODULE_UTILS_PATH not in sys.path:
+    sys.path.append(_MODULE_UTILS_PATH)
+
+from saltbox_facts_store import (  # noqa: E402
+    get_current_identity,
+    get_file_path,
+    merge_facts,
+    normalize_instances,
+    parse_mode,
+    read_config_state,
+    resolve_ownership,
+    validate_instance_name,
+    validate_keys,
+)
+
+# Arguments the controller-side load understands; anything else goes to the module.
+LOAD_ARGS = frozenset({
+    'role', 'instance', 'instances', 'keys', 'owner', 'group', 'mode', 'overwrite', 'base_path'
+})
+
+
+class ActionModule(ActionBase):
+    """
+    Serves load-only saltbox_facts calls on the controller.
+
+    Saltbox targets the local machine, so the role file the module would read
+    is directly readable here. When every requested key is already stored and
+    the file already has the requested owner, group and mode, the facts are
+    returned without shipping and running the module. Saves, deletes and
+    anything the controller cannot decide with certainty run the module.
+    """
+
+    TRANSFERS_FILES = False
+
+    def run(self, tmp: Any = None, task_vars: dict[str, Any] | None = None) -> dict[str, Any]:
+        result = super().run(tmp, task_vars)
+        del tmp
+
+        facts = self._load_on_controller(self._task.args)
+        if facts is not None:
+            result.update(changed=False, message='', facts=facts)
+            return result
+
+        result.update(self._execute_module(task_vars=task_vars))
+        return result
+
+    def _load_on_controller(self, args: dict[str, Any]) -> dict[str, Any] | None:
+        """
+        Return the facts the module would return without changes, or None if
+        the module has to run.
+        """
+        if self._connection.transport != 'local' or self._task.check_mode:
+            return None
+        if not set(args) <= LOAD_ARGS:
+            return None
+
+        owner = args.get('owner')
+        group = args.get('group')
+        # Without become the module runs as the controller user, which makes
+        # the default owner and group known here.
+        if self._play_context.become and not (owner and group):
+            return None
+
+        try:
+            role = args['role']
+            base_path = args['base_path']
+            instance = args.get('instance')
+            instances = args.get('instances')
+            keys = args.get('keys') or {}
+            overwrite = boolean(args.get('overwrite', False), strict=True)
+            mode = parse_mode(args.get('mode', '0640'))
+
+            if (instance is None) == (instances is None):
+                return None
+            if instances is None:
+                validate_instance_name(instance)
+                instance_keys = {instance: keys}
+            else:
+                instance_keys = normalize_instances(instances, keys)
+            for own_keys in instance_keys.values():
+                validate_keys(own_keys)
+
+            file_path = get_file_path(role, base_path)
+            config, _, file_stat = read_config_state(file_path)
+
+            all_facts: dict[str, dict[str, str]] = {}
+            for name, own_keys in instance_keys.items():
+                all_facts[name], changed = merge_facts(config, name, own_keys, overwrite)
+                if changed:
+                    return None
+
+            if file_stat is not None:
+                current_user, current_group = get_current_identity()
+                uid, gid = resolve_ownership(owner or current_user, group or current_group)
+                if (file_stat.st_uid, file_stat.st_gid, stat.S_IMODE(file_stat.st_mode)) != (uid, gid, mode):
+                    return None
+        except (KeyError, TypeError, ValueError, OSError):
+            # Let the module report invalid arguments and unreadable files.
+            return None
+
+        return all_facts if instances is not None else all_facts[instance]
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+DOCUMENTATION = """
+    name: saltbox_lookup_profile
+    type: aggregate
+    short_description: Profiles the role_var, docker_var and docker_vars lookups
+    description:
+      - Aggregates call counts, cumulative time and cache hits and misses for each Saltbox variable lookup.
+      - Reports the (role, suffix) pairs with the highest cumulative templating time when the playbook ends.
+      - Times are inclusive, so lookups resolving to expressions that call other lookups include their cost.
+      - Enable it alongside profile_tasks, e.g. C(ANSIBLE_CALLBACKS_ENABLED=profile_tasks,saltbox_lookup_profile).
+    author: salty
+    requirements:
+      - enable in configuration
+    options:
+      top:
+        description: Number of (role, suffix) pairs to report.
+        type: int
+        default: 25
+        env:
+          - name: SALTBOX_LOOKUP_PROFILE_TOP
+        ini:
+          - section: callback_saltbox_lookup_profile
+            key: top
+      output_path:
+        description: Optional path of a JSON file receiving the full report.
+        type: path
+        required: false
+        env:
+          - name: SALTBOX_LOOKUP_PROFILE_OUTPUT
+        ini:
+          - section: callback_saltbox_lookup_profile
+            key: output_path
+"""
+
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+from typing import Any
+
+from ansible.plugins.callback import CallbackBase
+
+_MODULE_UTILS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'module_utils')
+if _MODULE_UTILS_PATH not in sys.path:
+    sys.path.append(_MODULE_UTILS_PATH)
+
+from saltbox_lookup import PROFILE_DIR_ENV, summarize_lookup_profile  # noqa: E402
+
+
+def _remove_spool(spool_path: str, owner_pid: int) -> None:
+    # Forked workers inherit atexit handlers; only the controller removes the spool.
+    if os.getpid() == owner_pid:
+        shutil.rmtree(spool_path, ignore_errors=True)
+
+
+class CallbackModule(CallbackBase):
+    """
+    Collects lookup timings spooled by worker processes and reports them at the end of the playbook.
+    """
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'saltbox_lookup_profile'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self) -> None:
+        super().__init__()
+        # Workers are forked from this process, so they inherit the variable
+        # and write their timings into the spool directory.
+        self._spool_path: str = tempfile.mkdtemp(prefix='saltbox-lookup-profile-')
+        os.environ[PROFILE_DIR_ENV] = self._spool_path
+        # Failed and --syntax-check runs never reach v2_playbook_on_stats.
+        atexit.register(_remove_spool, self._spool_path, os.getpid())
+
+    def v2_playbook_on_stats(self, stats: Any) -> None:
+        top: int = self.get_option('top')
+        output_path: str | None = self.get_option('output_path')
+
+        try:
+            report = summarize_lookup_profile(self._spool_path, top)
+        finally:
+            os.environ.pop(PROFILE_DIR_ENV, None)
+            shutil.rmtree(self._spool_path, ignore_errors=True)
+
+        self._display.banner("LOOKUP PROFILE")
+        if not report['lookups']:
+            self._display.display("No role_var, docker_var or docker_vars calls were recorded.")
+            return
+
+        for name, totals in sorted(report['lookups'].items()):
+            cache = ", ".join(f"{key}={value}" for key, value in sorted(totals['cache'].items()))
+            self._display.display(
+                f"{name:<12} calls={totals['calls']:<6} total={totals['seconds']:.3f}s"
+                + (f" cache: {cache}" if cache else "")
+            )
+
+        self._display.display("")
+        for pair in report['pairs']:
+            self._display.display(
+                f"{pair['seconds']:>8.3f}s  {pair['calls']:>5} calls  max {pair['max_seconds']:.3f}s  "
+                f"{pair['lookup']}: {pair['role']} {pair['suffix']}"
+            )
+
+        if output_path:
+            try:
+                with open(output_path, 'w', encoding='utf-8') as output_file:
+                    json.dump(report, output_file, indent=2, sort_keys=True)
+            except OSError as error:
+                self._display.warning(f"Unable to write lookup profile to '{output_path}': {error}")
@@ -1,21 +1,37 @@
 from ansible.errors import AnsibleFilterError
 import os
-import configparser
+import sys
+
+_MODULE_UTILS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'module_utils')
+if _MODULE_UTILS_PATH not in sys.path:
+    sys.path.append(_MODULE_UTILS_PATH)
+
+from saltbox_facts_store import cached_config  # noqa: E402
 
 class FilterModule(object):
     def filters(self):
         return {
-            'check_plex_ini': self.check_plex_ini
+            'check_plex_ini': self.check_plex_ini,
+            'check_plex_ini_all': self.check_plex_ini_all
         }
 
+    def _read(self, file_path):
+        # Parsed once per run and reused until plex.ini changes on disk.
+        # Returns False if the file is missing and None if it can't be read.
+        try:
+            config = cached_config(file_path)
+        except OSError:
+            return None
+        except ValueError as e:
+            raise AnsibleFilterError(str(e))
+        return False if config is None else config
+
     def check_plex_ini(self, file_path, plex_name):
-        if not os.path.exists(file_path):
+        config = self._read(file_path)
+        if config is False:
             return {'exists': False, 'identifier': '', 'token': ''}
 
-        config = configparser.ConfigParser()
-        config.read(file_path)
-
-        if plex_name not in config.sections():
+        if config is None or plex_name not in config.sections():
             return {'exists': True, 'identifier': '', 'token': ''}
 
         section = config[plex_name]
@@ -24,3 +40,18 @@ class FilterModule(object):
             'identifier': section.get('client_identifier', ''),
             'token': section.get('token', '')
         }
+
+    def check_plex_ini_all(self, file_path):
+        # Identifiers and tokens of every Plex instance in the file, keyed by instance name.
+        config = self._read(file_path)
+        if config is False:
+            return {'exists': False, 'instances': {}}
+
+        instances = {}
+        for plex_name in (config.sections() if config is not None else []):
+            section = config[plex_name]
+            instances[plex_name] = {
+                'identifier': section.get('client_identifier', ''),
+                'token': section.get('token', '')
+            }
+        return {'exists': True, 'instances': instances}
@@ -7,8 +7,14 @@ def filter_rclone_remote_name(item):
         remote = item['remote']
         return remote.split(':')[0] if ':' in remote else remote
 
+def filter_rclone_remote_names(items):
+    # Batch form of filter_rclone_remote_name for templates that loop over every remote.
+    return [filter_rclone_remote_name(item) for item in items]
+
+_LOCAL_PATH_PREFIXES = ('/', './', '../', '~')
+
 def _is_local_path(remote):
-    return remote.startswith('/') or remote.startswith('./') or remote.startswith('../') or remote.startswith('~')
+    return remote.startswith(_LOCAL_PATH_PREFIXES)
 
 def filter_rclone_remote_with_path(item):
     remote = item['remote']
@@ -16,6 +22,10 @@ def filter_rclone_remote_with_path(item):
         return remote
     return remote + ':'
 
+def filter_rclone_remotes_with_path(items):
+    # Batch form of filter_rclone_remote_with_path.
+    return [filter_rclone_remote_with_path(item) for item in items]
+
 def filter_rclone_first_remote_name(rclone):
     remote = rclone['remotes'][0]['remote']
     return remote.split(':')[0] if ':' in remote else remote
@@ -30,7 +40,9 @@ class FilterModule(object):
     def filters(self):
         return {
             'filter_rclone_remote_name': filter_rclone_remote_name,
+            'filter_rclone_remote_names': filter_rclone_remote_names,
             'filter_rclone_remote_with_path': filter_rclone_remote_with_path,
+            'filter_rclone_remotes_with_path': filter_rclone_remotes_with_path,
             'filter_rclone_first_remote_name': filter_rclone_first_remote_name,
             'filter_rclone_first_remote_name_with_path': filter_rclone_first_remote_name_with_path,
         }
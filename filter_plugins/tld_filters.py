@@ -0,0 +1,37 @@
+import os
+import sys
+
+from ansible.errors import AnsibleFilterError
+
+_MODULE_UTILS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'module_utils')
+if _MODULE_UTILS_PATH not in sys.path:
+    sys.path.append(_MODULE_UTILS_PATH)
+
+from saltbox_tld import parse_url  # noqa: E402
+
+
+def _parse(url, record):
+    if not isinstance(url, str):
+        raise AnsibleFilterError(f"tld_parse expects a domain or URL string, got {type(url).__name__}")
+    try:
+        return parse_url(url, record)
+    except ImportError:
+        raise AnsibleFilterError("The 'tld' Python library is required. Install it with: pip install tld")
+    except ValueError as e:
+        raise AnsibleFilterError(f"Failed to parse domain: {e!s}")
+
+
+def tld_parse(value, record=''):
+    # Same result as the tld_parse module, parsed on the controller.
+    # A list of domains returns a list of results in the same order.
+    record = record or ''
+    if isinstance(value, (list, tuple)):
+        return [_parse(url, record) for url in value]
+    return _parse(value, record)
+
+
+class FilterModule(object):
+    def filters(self):
+        return {
+            'tld_parse': tld_parse,
+        }
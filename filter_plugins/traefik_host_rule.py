@@ -19,6 +19,22 @@ def traefik_host_rule(host, host_override, fqdn_override_list):
     else:
         return f"Host(`{host}`)"
 
+def traefik_host_rules(entries):
+    """
+    Ansible filter to generate Traefik host rules for several hosts at once.
+
+    Args:
+        entries (list): Dicts with 'host' and the optional 'host_override'
+                        and 'fqdn_override' keys.
+
+    Returns:
+        list: The generated Traefik host rules, in the same order.
+    """
+    return [
+        traefik_host_rule(entry.get('host', ''), entry.get('host_override', ''), entry.get('fqdn_override', []))
+        for entry in entries
+    ]
+
 class FilterModule(object):
     """ Ansible filter module """
 
@@ -26,4 +42,5 @@ class FilterModule(object):
         """ return list of filters """
         return {
             'traefik_host_rule': traefik_host_rule,
+            'traefik_host_rules': traefik_host_rules,
         }
@@ -7,6 +7,7 @@ DOCUMENTATION = """
 module: cloudflare_dns_records
 description:
     - "This module fetches DNS records from Cloudflare for a specific zone and record name."
+    - "In snapshot mode it fetches every record of the zone at once and returns them indexed by name and type, so many records can be checked from one registered result."
     - "It supports both API key and API token authentication methods."
 author: salty
 requirements:
@@ -40,8 +41,32 @@ options:
             - Fully qualified DNS record name to fetch (e.g., subdomain.example.com)
             - A trailing DNS dot is accepted and removed before querying Cloudflare
             - C(@) and C(@.example.com) are accepted as zone-apex records
-        required: true
+            - C(*) fetches a snapshot of the whole zone
+            - Mutually exclusive with records
+        required: false
         type: str
+    records:
+        description:
+            - Fully qualified DNS record names to return from a snapshot of the whole zone
+            - Names are normalized like C(record)
+            - Mutually exclusive with record
+        required: false
+        type: list
+        elements: str
+    zone_cache_path:
+        description:
+            - JSON file caching zone IDs, shared by the Saltbox Cloudflare modules
+            - Entries are tied to the credentials and dropped when the API rejects a cached ID with 404, 401 or 403
+            - Caching is skipped when the directory does not exist
+        required: false
+        type: path
+        default: /opt/saltbox/cloudflare_zones.json
+    zone_cache_ttl:
+        description:
+            - Seconds a cached zone ID is used, 0 disables the cache
+        required: false
+        type: int
+        default: 86400
 """
 
 EXAMPLES = """
@@ -66,6 +91,18 @@ EXAMPLES = """
 - name: Display records
   ansible.builtin.debug:
     var: dns_records.records
+
+# Fetch the whole zone once and look records up by name and type
+- name: Fetch a snapshot of the zone
+  cloudflare_dns_records:
+    auth_token: "{{ cloudflare_api_token }}"
+    zone_name: "example.com"
+    record: "*"
+  register: dns_zone_records
+
+- name: Display the A records of an application
+  ansible.builtin.debug:
+    var: dns_zone_records.records_by_name['app.example.com']['A'] | default([])
 """
 
 RETURN = """
@@ -93,6 +130,13 @@ records:
             description: Whether Cloudflare proxies the record
             type: bool
             returned: when supported by the record type
+records_by_name:
+    description:
+        - The returned records indexed by lowercase name and then by type
+        - Every name given in C(records) is present, with an empty dictionary when it has no records
+    type: dict
+    returned: when record is C(*) or records is given
+    sample: {"app.example.com": {"A": [{"name": "app.example.com", "type": "A", "content": "203.0.113.10", "proxied": true}]}}
 zone_id:
     description: The Cloudflare zone ID for the specified zone
     type: str
@@ -106,6 +150,16 @@ changed:
 from typing import TYPE_CHECKING
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.saltbox_cloudflare import (
+    DEFAULT_ZONE_CACHE_PATH,
+    DEFAULT_ZONE_CACHE_TTL,
+    ZoneIdCache,
+    ZoneLookupError,
+    ZoneNotFoundError,
+    credentials_fingerprint,
+    list_zone_records,
+    with_zone_id,
+)
 
 if TYPE_CHECKING:
     from cloudflare import Cloudflare
@@ -136,57 +190,52 @@ def normalize_record_name(value: str, zone_name: str, module: AnsibleModule) ->
     return normalized
 
 
-def get_zone_id(client: "Cloudflare", zone_name: str, module: AnsibleModule) -> str:
+def fetch_dns_records(client: "Cloudflare", zone_id: str, record_name: str) -> list[dict[str, object]]:
     """
-    Fetch the zone ID for a given zone name from Cloudflare.
+    Fetch DNS records from Cloudflare.
 
     Args:
         client: Cloudflare client instance
-        zone_name (str): Name of the zone to look up
-        module: AnsibleModule instance for error reporting
+        zone_id (str): The Cloudflare zone ID
+        record_name (str): The DNS record name to fetch
 
     Returns:
-        str: The zone ID
+        list: List of DNS records
 
     Raises:
-        Calls module.fail_json on error
+        Exception: If the request fails
     """
-    try:
-        zone = client.zones.list(name=zone_name)
-        if len(zone.result) == 0:
-            module.fail_json(msg=f"Specified zone '{zone_name}' was not found")
-        return zone.result[0].id
-    except Exception as e:
-        module.fail_json(msg=f"Error fetching zone ID: {str(e)}")
+    records_response = client.dns.records.list(zone_id=zone_id, name={"exact": record_name})
+    if records_response is None:
+        raise ValueError("No response from Cloudflare API")
+
+    records: list[dict[str, object]] = []
+    for page in records_response.iter_pages():
+        records.extend(record.to_dict() for record in page.result)
+    return records
 
 
-def fetch_dns_records(client: "Cloudflare", zone_id: str, record_name: str, module: AnsibleModule) -> list[dict[str, object]]:
+def index_records(
+    records: list[dict[str, object]],
+    names: list[str] | None = None
+) -> dict[str, dict[str, list[dict[str, object]]]]:
     """
-    Fetch DNS records from Cloudflare.
+    Index records by lowercase name and type.
 
     Args:
-        client: Cloudflare client instance
-        zone_id (str): The Cloudflare zone ID
-        record_name (str): The DNS record name to fetch
-        module: AnsibleModule instance for error reporting
+        records (list): Records as returned by the API
+        names (list): Lowercase names to keep, or None to keep every record
 
     Returns:
-        list: List of DNS records
-
-    Raises:
-        Calls module.fail_json on error
+        dict: Records keyed by name, then by type
     """
-    try:
-        records_response = client.dns.records.list(zone_id=zone_id, name={"exact": record_name})
-        if records_response is None:
-            module.fail_json(msg="No response from Cloudflare API")
-
-        records: list[dict[str, object]] = []
-        for page in records_response.iter_pages():
-            records.extend(record.to_dict() for record in page.result)
-        return records
-    except Exception as e:
-        module.fail_json(msg=f"Error fetching DNS records: {str(e)}")
+    indexed: dict[str, dict[str, list[dict[str, object]]]] = {name: {} for name in names or ()}
+    for record in records:
+        name = str(record['name']).lower()
+        if names is not None and name not in indexed:
+            continue
+        indexed.setdefault(name, {}).setdefault(str(record['type']), []).append(record)
+    return indexed
 
 
 def run_module() -> None:
@@ -201,10 +250,13 @@ def run_module() -> None:
         auth_key=dict(type='str', required=False, no_log=True),
         auth_token=dict(type='str', required=False, no_log=True),
         zone_name=dict(type='str', required=True),
-        record=dict(type='str', required=True),
+        record=dict(type='str', required=False),
+        records=dict(type='list', elements='str', required=False),
+        zone_cache_path=dict(type='path', default=DEFAULT_ZONE_CACHE_PATH),
+        zone_cache_ttl=dict(type='int', default=DEFAULT_ZONE_CACHE_TTL),
     )
 
-    result: dict[str, bool | str | list[dict[str, object]]] = {
+    result: dict[str, object] = {
         'changed': False,
         'records': [],
         'zone_id': '',
@@ -214,13 +266,15 @@ def run_module() -> None:
         argument_spec=module_args,
         supports_check_mode=True,
         required_one_of=[
-            ['auth_token', 'auth_key']
+            ['auth_token', 'auth_key'],
+            ['record', 'records']
         ],
         required_together=[
             ['auth_email', 'auth_key']
         ],
         mutually_exclusive=[
-            ['auth_token', 'auth_key']
+            ['auth_token', 'auth_key'],
+            ['record', 'records']
         ],
     )
 
@@ -235,7 +289,14 @@ def run_module() -> None:
         auth_key = module.params.get('auth_key')
         auth_token = module.params.get('auth_token')
         zone_name = normalize_dns_name(module.params['zone_name'], 'zone_name', module)
-        record = normalize_record_name(module.params['record'], zone_name, module)
+        names: list[str] | None = None
+        record: str | None = None
+        if module.params['records'] is not None:
+            names = list(dict.fromkeys(
+                normalize_record_name(name, zone_name, module).lower() for name in module.params['records']
+            ))
+        elif module.params['record'].strip() != '*':
+            record = normalize_record_name(module.params['record'], zone_name, module)
 
         # Initialize Cloudflare client
         if auth_token:
@@ -243,12 +304,33 @@ def run_module() -> None:
         else:
             cf = Cloudflare(api_email=auth_email, api_key=auth_key)
 
-        # Fetch zone ID
-        zone_id = get_zone_id(cf, zone_name, module)
+        zone_cache = ZoneIdCache(
+            module.params['zone_cache_path'],
+            module.params['zone_cache_ttl'],
+            credentials_fingerprint(auth_email, auth_key, auth_token)
+        )
+
+        def fetch(zone_id: str) -> list[dict[str, object]]:
+            if record is None:
+                return list_zone_records(cf, zone_id)
+            return fetch_dns_records(cf, zone_id, record)
+
+        # Fetch DNS records, with the zone ID cached across runs
+        try:
+            zone_id, records = with_zone_id(cf, zone_name, zone_cache, fetch)
+        except ZoneNotFoundError:
+            module.fail_json(msg=f"Specified zone '{zone_name}' was not found")
+        except ZoneLookupError as e:
+            module.fail_json(msg=f"Error fetching zone ID: {str(e)}")
+        except Exception as e:
+            module.fail_json(msg=f"Error fetching DNS records: {str(e)}")
         result['zone_id'] = zone_id
 
-        # Fetch DNS records
-        records = fetch_dns_records(cf, zone_id, record, module)
+        if record is None:
+            records_by_name = index_records(records, names)
+            if names is not None:
+                records = [item for name in names for items in records_by_name[name].values() for item in items]
+            result['records_by_name'] = records_by_name
         result['records'] = records
 
         module.exit_json(**result)
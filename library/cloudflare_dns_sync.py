@@ -0,0 +1,509 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+DOCUMENTATION = """
+---
+module: cloudflare_dns_sync
+description:
+    - "This module reconciles Cloudflare DNS records of a zone with a desired set of records."
+    - "The existing records are fetched once, compared locally, and all creates, updates and deletes are applied through the Cloudflare batch endpoint."
+    - "Up to 10 distinct record names are fetched with one exact name query each. Larger sets fetch the whole zone instead."
+    - "Present records are exclusive, so other records with the same name and type are removed. A and AAAA records also replace a CNAME record of the same name, and a CNAME record replaces A and AAAA records."
+    - "It supports both API key and API token authentication methods."
+author: salty
+requirements:
+    - cloudflare==5.6.0
+options:
+    auth_email:
+        description:
+            - Email associated with Cloudflare account
+            - Required when using auth_key authentication
+        required: false
+        type: str
+    auth_key:
+        description:
+            - API key for Cloudflare
+            - Required when using auth_key authentication
+        required: false
+        type: str
+    auth_token:
+        description:
+            - API token for Cloudflare
+            - Can be used instead of auth_email and auth_key
+        required: false
+        type: str
+    zone_name:
+        description:
+            - Name of the Cloudflare zone (e.g., example.com)
+        required: true
+        type: str
+    records:
+        description:
+            - The desired records
+        required: true
+        type: list
+        elements: dict
+        suboptions:
+            name:
+                description:
+                    - Record name, relative to the zone or fully qualified
+                    - C(@) is the zone apex
+                required: true
+                type: str
+            type:
+                description: DNS record type
+                required: true
+                type: str
+                choices: [A, AAAA, CNAME, TXT]
+            content:
+                description:
+                    - Record content, required for present records
+                    - For absent records, only records with this content are removed when it is not empty
+                required: false
+                type: str
+                default: ''
+            proxied:
+                description: Whether Cloudflare proxies the record
+                required: false
+                type: bool
+                default: false
+            ttl:
+                description: TTL in seconds, 1 for automatic. Proxied records always use automatic.
+                required: false
+                type: int
+                default: 1
+            state:
+                description: Whether the record should exist
+                required: false
+                type: str
+                default: present
+                choices: [present, absent]
+            fail_msg:
+                description:
+                    - Fail with this message if the record would have to be created or updated
+                    - Lets a record whose content is known to be invalid pass while the zone already matches it
+                required: false
+                type: str
+                default: ''
+    batch_size:
+        description:
+            - Maximum number of changes sent in one batch request
+            - Changes are applied in the order deletes, updates, creates across all batches
+        required: false
+        type: int
+        default: 200
+    zone_cache_path:
+        description:
+            - JSON file caching zone IDs, shared by the Saltbox Cloudflare modules
+            - Entries are tied to the credentials and dropped when the API rejects a cached ID with 404, 401 or 403
+            - Caching is skipped when the directory does not exist
+        required: false
+        type: path
+        default: /opt/saltbox/cloudflare_zones.json
+    zone_cache_ttl:
+        description:
+            - Seconds a cached zone ID is used, 0 disables the cache
+        required: false
+        type: int
+        default: 86400
+"""
+
+EXAMPLES = """
+- name: Point an application at the server
+  cloudflare_dns_sync:
+    auth_email: "user@example.com"
+    auth_key: "{{ cloudflare_api_key }}"
+    zone_name: "example.com"
+    records:
+      - name: sonarr
+        type: A
+        content: "203.0.113.10"
+        proxied: true
+      - name: sonarr
+        type: AAAA
+        state: absent
+  register: dns_sync
+"""
+
+RETURN = """
+changes:
+    description:
+        - The changes made, or that would be made in check mode
+    type: list
+    elements: dict
+    returned: success
+    contains:
+        action:
+            description: One of created, updated or deleted
+            type: str
+            returned: success
+        name:
+            description: Fully qualified DNS record name
+            type: str
+            returned: success
+        type:
+            description: DNS record type
+            type: str
+            returned: success
+        content:
+            description: Record content after the change, or of the deleted record
+            type: str
+            returned: success
+        proxied:
+            description: Whether Cloudflare proxies the record
+            type: bool
+            returned: success
+zone_id:
+    description: The Cloudflare zone ID for the specified zone
+    type: str
+    returned: success
+changed:
+    description: Whether any record was created, updated or deleted
+    type: bool
+    returned: always
+"""
+
+import ipaddress
+from typing import TYPE_CHECKING, Any
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.saltbox_cloudflare import (
+    DEFAULT_ZONE_CACHE_PATH,
+    DEFAULT_ZONE_CACHE_TTL,
+    ZoneIdCache,
+    ZoneLookupError,
+    ZoneNotFoundError,
+    NAME_QUERY_LIMIT,
+    credentials_fingerprint,
+    list_named_records,
+    list_zone_records,
+    with_zone_id,
+)
+
+if TYPE_CHECKING:
+    from cloudflare import Cloudflare
+
+# Record types that cannot share a name with a CNAME record.
+ADDRESS_TYPES = ('A', 'AAAA')
+
+
+def normalize_dns_name(value: str, parameter: str, module: AnsibleModule) -> str:
+    """
+    Normalize a DNS name accepted by the module.
+
+    Surrounding whitespace and one optional terminal DNS dot are removed.
+    Empty values are rejected before making a Cloudflare API request.
+    """
+    normalized = value.strip()
+    if normalized.endswith('.'):
+        normalized = normalized[:-1]
+    if not normalized:
+        module.fail_json(msg=f"{parameter} must not be empty")
+    return normalized
+
+
+def qualify_record_name(value: str, zone_name: str, module: AnsibleModule) -> str:
+    """
+    Return the fully qualified name of a record given relative to the zone or
+    fully qualified, including Cloudflare's apex convention.
+    """
+    normalized = normalize_dns_name(value, 'name', module).lower()
+    if normalized in ('@', f"@.{zone_name}", zone_name):
+        return zone_name
+    if normalized.endswith(f".{zone_name}"):
+        return normalized
+    return f"{normalized}.{zone_name}"
+
+
+def normalize_content(record_type: str, content: str) -> str:
+    """
+    Normalize record content so equal values compare equal.
+    """
+    content = content.strip()
+    if record_type == 'AAAA':
+        try:
+            return str(ipaddress.IPv6Address(content))
+        except ValueError:
+            return content
+    if record_type == 'CNAME':
+        return content.rstrip('.').lower()
+    return content
+
+
+def fetch_zone_records(
+    client: "Cloudflare",
+    zone_id: str,
+    names: list[str]
+) -> dict[tuple[str, str], list[dict[str, Any]]]:
+    """
+    Fetch the existing DNS records of the given names.
+
+    Small sets are fetched with one name.exact query per name, so a single
+    application's records don't pull the whole zone. Larger sets list every
+    record of the zone at once, which then costs fewer requests.
+
+    Args:
+        client: Cloudflare client instance
+        zone_id (str): The Cloudflare zone ID
+        names (list): Fully qualified, lowercase record names
+
+    Returns:
+        dict: Records keyed by (lowercase name, type)
+
+    Raises:
+        Exception: If the request fails
+    """
+    if len(names) <= NAME_QUERY_LIMIT:
+        fetched = list_named_records(client, zone_id, names)
+    else:
+        fetched = list_zone_records(client, zone_id)
+
+    records: dict[tuple[str, str], list[dict[str, Any]]] = {}
+    for record in fetched:
+        records.setdefault((record['name'].lower(), record['type']), []).append(record)
+    return records
+
+
+def describe(action: str, record: dict[str, Any]) -> dict[str, Any]:
+    return {
+        'action': action,
+        'name': record['name'],
+        'type': record['type'],
+        'content': record.get('content', ''),
+        'proxied': bool(record.get('proxied', False)),
+    }
+
+
+def plan_changes(
+    desired: list[dict[str, Any]],
+    existing: dict[tuple[str, str], list[dict[str, Any]]],
+    zone_name: str,
+    module: AnsibleModule
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]], list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    Compare the desired records with the zone's records.
+
+    An existing record of the same name and type is updated in place rather
+    than deleted and recreated.
+
+    Returns:
+        tuple: (deletes, patches, posts, changes) where the first three are
+               batch endpoint payloads
+    """
+    deletes: list[dict[str, Any]] = []
+    patches: list[dict[str, Any]] = []
+    posts: list[dict[str, Any]] = []
+    changes: list[dict[str, Any]] = []
+    deleted_ids: set[str] = set()
+    seen: set[tuple[str, str]] = set()
+
+    def delete(record: dict[str, Any]) -> None:
+        if record['id'] not in deleted_ids:
+            deleted_ids.add(record['id'])
+            deletes.append({'id': record['id']})
+            changes.append(describe('deleted', record))
+
+    for item in desired:
+        name = qualify_record_name(item['name'], zone_name, module)
+        record_type = item['type']
+        key = (name, record_type)
+        if key in seen:
+            module.fail_json(msg=f"Record '{name}' of type {record_type} is listed more than once")
+        seen.add(key)
+
+        current = existing.get(key, [])
+        content = normalize_content(record_type, item['content'] or '')
+
+        if item['state'] == 'absent':
+            for record in current:
+                if not content or normalize_content(record_type, record.get('content', '')) == content:
+                    delete(record)
+            continue
+
+        if not content:
+            module.fail_json(msg=item['fail_msg'] or f"Record '{name}' of type {record_type} needs content to be present")
+
+        conflicting = ADDRESS_TYPES if record_type == 'CNAME' else ('CNAME',) if record_type in ADDRESS_TYPES else ()
+        for conflicting_type in conflicting:
+            for record in existing.get((name, conflicting_type), []):
+                delete(record)
+
+        proxied = bool(item['proxied'])
+        ttl = 1 if proxied else item['ttl']
+        wanted = {'name': name, 'type': record_type, 'content': content, 'proxied': proxied, 'ttl': ttl}
+
+        matching = [record for record in current if normalize_content(record_type, record.get('content', '')) == content]
+        keep = matching[0] if matching else (current[0] if current else None)
+
+        for record in current:
+            if record is not keep:
+                delete(record)
+
+        needs_write = keep is None or (
+            not matching
+            or bool(keep.get('proxied', False)) != proxied
+            or (not proxied and keep.get('ttl') != ttl)
+        )
+        if needs_write and item['fail_msg']:
+            module.fail_json(msg=item['fail_msg'])
+
+        if keep is None:
+            posts.append(wanted)
+            changes.append(describe('created', wanted))
+        elif needs_write:
+            patches.append(dict(wanted, id=keep['id']))
+            changes.append(describe('updated', wanted))
+
+    return deletes, patches, posts, changes
+
+
+def apply_changes(
+    client: "Cloudflare",
+    zone_id: str,
+    deletes: list[dict[str, Any]],
+    patches: list[dict[str, Any]],
+    posts: list[dict[str, Any]],
+    batch_size: int,
+    module: AnsibleModule
+) -> None:
+    """
+    Apply the changes through the batch endpoint.
+
+    The endpoint applies deletes, then patches, then posts of one request
+    atomically. Changes are split into requests of at most batch_size in
+    that same order, so a deleted CNAME record is always gone before an
+    address record of the same name is created.
+
+    Raises:
+        Calls module.fail_json on error
+    """
+    operations = [('deletes', change) for change in deletes]
+    operations.extend(('patches', change) for change in patches)
+    operations.extend(('posts', change) for change in posts)
+
+    for start in range(0, len(operations), batch_size):
+        batch: dict[str, list[dict[str, Any]]] = {}
+        for operation, change in operations[start:start + batch_size]:
+            batch.setdefault(operation, []).append(change)
+        try:
+            client.dns.records.batch(zone_id=zone_id, **batch)
+        except Exception as e:
+            module.fail_json(msg=f"Error applying DNS record changes: {str(e)}")
+
+
+def run_module() -> None:
+    """
+    Main module execution.
+
+    This function handles the module's argument parsing, execution flow,
+    and return value preparation.
+    """
+    module_args = dict(
+        auth_email=dict(type='str', required=False, no_log=False),
+        auth_key=dict(type='str', required=False, no_log=True),
+        auth_token=dict(type='str', required=False, no_log=True),
+        zone_name=dict(type='str', required=True),
+        records=dict(
+            type='list',
+            elements='dict',
+            required=True,
+            options=dict(
+                name=dict(type='str', required=True),
+                type=dict(type='str', required=True, choices=['A', 'AAAA', 'CNAME', 'TXT']),
+                content=dict(type='str', default=''),
+                proxied=dict(type='bool', default=False),
+                ttl=dict(type='int', default=1),
+                state=dict(type='str', default='present', choices=['present', 'absent']),
+                fail_msg=dict(type='str', default=''),
+            ),
+        ),
+        batch_size=dict(type='int', default=200),
+        zone_cache_path=dict(type='path', default=DEFAULT_ZONE_CACHE_PATH),
+        zone_cache_ttl=dict(type='int', default=DEFAULT_ZONE_CACHE_TTL),
+    )
+
+    result: dict[str, bool | str | list[dict[str, Any]]] = {
+        'changed': False,
+        'changes': [],
+        'zone_id': '',
+    }
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True,
+        required_one_of=[
+            ['auth_token', 'auth_key']
+        ],
+        required_together=[
+            ['auth_email', 'auth_key']
+        ],
+        mutually_exclusive=[
+            ['auth_token', 'auth_key']
+        ],
+    )
+
+    try:
+        # Import cloudflare here to provide better error message if not installed
+        try:
+            from cloudflare import Cloudflare
+        except ImportError:
+            module.fail_json(msg="The 'cloudflare' Python library is required. Install it with: pip install cloudflare")
+
+        auth_email = module.params.get('auth_email')
+        auth_key = module.params.get('auth_key')
+        auth_token = module.params.get('auth_token')
+        zone_name = normalize_dns_name(module.params['zone_name'], 'zone_name', module).lower()
+        batch_size = module.params['batch_size']
+        if batch_size < 1:
+            module.fail_json(msg="batch_size must be at least 1")
+
+        # Initialize Cloudflare client
+        if auth_token:
+            cf = Cloudflare(api_token=auth_token)
+        else:
+            cf = Cloudflare(api_email=auth_email, api_key=auth_key)
+
+        zone_cache = ZoneIdCache(
+            module.params['zone_cache_path'],
+            module.params['zone_cache_ttl'],
+            credentials_fingerprint(auth_email, auth_key, auth_token)
+        )
+
+        names = list(dict.fromkeys(
+            qualify_record_name(item['name'], zone_name, module) for item in module.params['records']
+        ))
+
+        # Fetch the existing records, with the zone ID cached across runs
+        try:
+            zone_id, existing = with_zone_id(cf, zone_name, zone_cache, lambda zone_id: fetch_zone_records(cf, zone_id, names))
+        except ZoneNotFoundError:
+            module.fail_json(msg=f"Specified zone '{zone_name}' was not found")
+        except ZoneLookupError as e:
+            module.fail_json(msg=f"Error fetching zone ID: {str(e)}")
+        except Exception as e:
+            module.fail_json(msg=f"Error fetching DNS records: {str(e)}")
+        result['zone_id'] = zone_id
+
+        deletes, patches, posts, changes = plan_changes(module.params['records'], existing, zone_name, module)
+        result['changes'] = changes
+        result['changed'] = bool(changes)
+
+        if changes and not module.check_mode:
+            apply_changes(cf, zone_id, deletes, patches, posts, batch_size, module)
+
+        module.exit_json(**result)
+
+    except Exception as e:
+        module.fail_json(msg=f"Unexpected error: {str(e)}")
+
+
+def main() -> None:
+    """
+    Module entry point.
+    """
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
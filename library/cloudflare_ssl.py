@@ -44,6 +44,20 @@ options:
             - Mutually exclusive with domain
         required: false
         type: str
+    zone_cache_path:
+        description:
+            - JSON file caching zone IDs, shared by the Saltbox Cloudflare modules
+            - Entries are tied to the credentials and dropped when the API rejects a cached ID with 404, 401 or 403
+            - Caching is skipped when the directory does not exist
+        required: false
+        type: path
+        default: /opt/saltbox/cloudflare_zones.json
+    zone_cache_ttl:
+        description:
+            - Seconds a cached zone ID is used, 0 disables the cache
+        required: false
+        type: int
+        default: 86400
 """
 
 EXAMPLES = """
@@ -92,6 +106,15 @@ changed:
 from typing import TYPE_CHECKING
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.saltbox_cloudflare import (
+    DEFAULT_ZONE_CACHE_PATH,
+    DEFAULT_ZONE_CACHE_TTL,
+    ZoneIdCache,
+    ZoneLookupError,
+    ZoneNotFoundError,
+    credentials_fingerprint,
+    with_zone_id,
+)
 
 if TYPE_CHECKING:
     from cloudflare import Cloudflare
@@ -112,60 +135,30 @@ def normalize_dns_name(value: str, parameter: str, module: AnsibleModule) -> str
     return normalized
 
 
-def get_zone_id(client: "Cloudflare", zone_name: str, module: AnsibleModule) -> str:
-    """
-    Fetch the zone ID for a given zone name from Cloudflare.
-
-    Args:
-        client: Cloudflare client instance
-        zone_name (str): Name of the zone to look up
-        module: AnsibleModule instance for error reporting
-
-    Returns:
-        str: The zone ID
-
-    Raises:
-        Calls module.fail_json on error
-    """
-    try:
-        zone = client.zones.list(name=zone_name)
-        if len(zone.result) == 0:
-            module.fail_json(msg=f"Specified zone '{zone_name}' was not found")
-        return zone.result[0].id
-    except Exception as e:
-        module.fail_json(msg=f"Error fetching zone ID: {str(e)}")
-        raise # Unreachable - Pylance silencer
-
-
-def get_ssl_tls_mode(client: "Cloudflare", zone_id: str, module: AnsibleModule) -> str:
+def get_ssl_tls_mode(client: "Cloudflare", zone_id: str) -> str:
     """
     Get the SSL/TLS settings for a zone.
 
     Args:
         client: Cloudflare client instance
         zone_id (str): The Cloudflare zone ID
-        module: AnsibleModule instance for error reporting
 
     Returns:
         str: The SSL/TLS mode value
 
     Raises:
-        Calls module.fail_json on error
+        Exception: If the request fails or returns no mode
     """
-    try:
-        ssl_response = client.zones.settings.get(setting_id='ssl', zone_id=zone_id)
-        if ssl_response is None:
-            module.fail_json(msg="No response from Cloudflare API")
+    ssl_response = client.zones.settings.get(setting_id='ssl', zone_id=zone_id)
+    if ssl_response is None:
+        raise ValueError("No response from Cloudflare API")
 
-        ssl_mode = getattr(ssl_response, 'value', None)
+    ssl_mode = getattr(ssl_response, 'value', None)
 
-        if ssl_mode is None:
-            module.fail_json(msg="SSL/TLS mode value not found in API response")
+    if ssl_mode is None:
+        raise ValueError("SSL/TLS mode value not found in API response")
 
-        return str(ssl_mode)
-    except Exception as e:
-        module.fail_json(msg=f"Error fetching SSL/TLS settings: {str(e)}")
-        raise # Unreachable - Pylance silencer
+    return str(ssl_mode)
 
 
 def run_module() -> None:
@@ -181,6 +174,8 @@ def run_module() -> None:
         auth_token=dict(type='str', required=False, no_log=True),
         domain=dict(type='str', required=False),
         zone_name=dict(type='str', required=False),
+        zone_cache_path=dict(type='path', default=DEFAULT_ZONE_CACHE_PATH),
+        zone_cache_ttl=dict(type='int', default=DEFAULT_ZONE_CACHE_TTL),
     )
 
     result = dict(
@@ -245,13 +240,23 @@ def run_module() -> None:
         else:
             cf = Cloudflare(api_email=auth_email, api_key=auth_key)
 
-        # Fetch zone ID
-        zone_id = get_zone_id(cf, zone_name, module)
+        zone_cache = ZoneIdCache(
+            module.params['zone_cache_path'],
+            module.params['zone_cache_ttl'],
+            credentials_fingerprint(auth_email, auth_key, auth_token)
+        )
+
+        # Fetch SSL/TLS mode, with the zone ID cached across runs
+        try:
+            zone_id, ssl_mode = with_zone_id(cf, zone_name, zone_cache, lambda zone_id: get_ssl_tls_mode(cf, zone_id))
+        except ZoneNotFoundError:
+            module.fail_json(msg=f"Specified zone '{zone_name}' was not found")
+        except ZoneLookupError as e:
+            module.fail_json(msg=f"Error fetching zone ID: {str(e)}")
+        except Exception as e:
+            module.fail_json(msg=f"Error fetching SSL/TLS settings: {str(e)}")
         result['zone_id'] = zone_id
         result['zone_name'] = zone_name
-
-        # Fetch SSL/TLS mode
-        ssl_mode = get_ssl_tls_mode(cf, zone_id, module)
         result['ssl_mode'] = ssl_mode
 
         module.exit_json(**result)
@@ -6,7 +6,10 @@ DOCUMENTATION = """
 ---
 module: find_open_port
 description:
-    - "This module finds an available port between a low and high bound."
+    - "This module finds available ports between a low and high bound."
+    - "Sockets are read from /proc/net, falling back to C(ss) when it is not available."
+    - "Ports in use are marked in a bitmap that is scanned once from the low bound, so large ranges cost no more than the ports they contain."
+    - "With a reservation file, returned ports are recorded there so concurrent or later runs do not hand out the same port before it is bound."
 author: salty
 options:
     low_bound:
@@ -25,6 +28,38 @@ options:
         required: false
         default: both
         type: str
+    count:
+        description:
+            - The number of distinct ports to find
+        required: false
+        default: 1
+        type: int
+    docker:
+        description:
+            - "Also treat the host ports bound by Docker containers as taken, including those of stopped containers, so the returned ports are free for a container to start on."
+            - "Containers are read with one list call to the Docker Engine API; only stopped containers are inspected, as the list has no ports for them."
+        required: false
+        default: false
+        type: bool
+    reservation_file:
+        description:
+            - "JSON file of ports handed out by earlier runs. Unexpired reservations are treated as in use and the returned ports are added to it."
+            - "A reservation is released once its port is bound on the host or by a Docker container, or when it expires."
+            - "The file is locked while ports are chosen, so concurrent runs never return the same port."
+        required: false
+        type: path
+    reservation_owner:
+        description:
+            - Name recorded with the reservations, such as the role or instance the ports are for
+        required: false
+        default: ''
+        type: str
+    reservation_ttl:
+        description:
+            - Seconds after which an unclaimed reservation expires
+        required: false
+        default: 3600
+        type: int
 """
 
 EXAMPLES = """
@@ -33,30 +68,92 @@ EXAMPLES = """
     low_bound: 5000
     high_bound: 6000
     protocol: tcp
+
+- name: Reserve two ports for an instance
+  find_open_port:
+    low_bound: 56881
+    high_bound: 56901
+    count: 2
+    reservation_file: /opt/saltbox/port_reservations.json
+    reservation_owner: qbittorrent
+
+- name: Find a port free on the host and in all Docker containers
+  find_open_port:
+    low_bound: 8090
+    high_bound: 8100
+    protocol: tcp
+    docker: true
 """
 
 RETURN = """
 meta:
-    description: Result metadata including the selected port.
+    description: Result metadata including the selected ports.
     type: dict
     returned: success
-    sample: {"port": 5432}
+    sample: {"port": 5432, "ports": [5432, 5433]}
     contains:
         port:
             description: Lowest observed unused port in the inclusive range.
             type: int
             returned: success
+        ports:
+            description: The selected ports in ascending order, starting with C(port).
+            type: list
+            elements: int
+            returned: success
 """
 
+import fcntl
+import http.client
+import json
+import os
+import re
+import socket
+import tempfile
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
 from ansible.module_utils.basic import AnsibleModule
 
+PROTOCOLS = ('tcp', 'udp')
+PORT_COUNT = 65536
+DOCKER_SOCKET = '/var/run/docker.sock'
+DOCKER_TIMEOUT = 10
 
-def parse_ports_in_use(output: str, protocol: str) -> set[int]:
+# Socket tables of the current network namespace, the same ones ss reads.
+PROC_NET_TABLES = {
+    'tcp': ('/proc/net/tcp', '/proc/net/tcp6'),
+    'udp': ('/proc/net/udp', '/proc/net/udp6'),
+}
+# Local port of each socket, from lines like
+# "   0: 0100007F:1F90 00000000:0000 0A ...". The pattern is anchored on the
+# local and remote address columns followed by the state, which no other
+# column matches. Only listening TCP sockets (state 0A) count, while every
+# UDP socket holds its port.
+PROC_NET_PATTERNS = {
+    'tcp': re.compile(rb':([0-9A-F]{4}) [0-9A-F]+:[0-9A-F]{4} 0A '),
+    'udp': re.compile(rb':([0-9A-F]{4}) [0-9A-F]+:[0-9A-F]{4} [0-9A-F]{2} '),
+}
+
+
+def new_port_map() -> dict[str, bytearray]:
     """
-    Parse listening TCP ports and all bound UDP ports from ``ss -Htuan`` output.
+    Return one bitmap per protocol with a byte per port number, set when the
+    port is taken.
     """
-    ports: set[int] = set()
+    return {name: bytearray(PORT_COUNT) for name in PROTOCOLS}
+
+
+def protocol_names(protocol: str) -> tuple[str, ...]:
+    return PROTOCOLS if protocol == 'both' else (protocol,)
 
+
+def parse_ports_in_use(output: str, port_map: dict[str, bytearray]) -> None:
+    """
+    Mark listening TCP ports and all bound UDP ports from ``ss -Htuan`` output.
+    """
     for line in output.splitlines():
         fields = line.split()
         if not fields:
@@ -65,9 +162,7 @@ def parse_ports_in_use(output: str, protocol: str) -> set[int]:
             raise ValueError(f"Unexpected ss output: {line}")
 
         socket_protocol = fields[0]
-        if socket_protocol not in ('tcp', 'udp'):
-            continue
-        if protocol != 'both' and socket_protocol != protocol:
+        if socket_protocol not in PROTOCOLS:
             continue
         if socket_protocol == 'tcp' and fields[1] != 'LISTEN':
             continue
@@ -79,58 +174,392 @@ def parse_ports_in_use(output: str, protocol: str) -> set[int]:
         port = int(port_text)
         if not 1 <= port <= 65535:
             raise ValueError(f"Invalid port in ss output: {port}")
-        ports.add(port)
+        port_map[socket_protocol][port] = 1
 
-    return ports
 
+def parse_proc_net(content: bytes, socket_protocol: str, port_map: dict[str, bytearray]) -> None:
+    """
+    Mark the ports of a /proc/net socket table.
 
-def get_ports_in_use(module: AnsibleModule, protocol: str) -> set[int]:
+    Only the local port column is decoded, and each distinct port once.
     """
-    Fetch TCP and UDP sockets from ``ss``.
+    bitmap = port_map[socket_protocol]
+    for port_hex in set(PROC_NET_PATTERNS[socket_protocol].findall(content)):
+        bitmap[int(port_hex, 16)] = 1
+    bitmap[0] = 0
+
+
+def read_proc_net() -> dict[str, bytearray] | None:
     """
+    Read the ports in use from /proc/net.
+
+    Returns:
+        dict: Port bitmaps, or None if the IPv4 tables are not readable. The
+              IPv6 tables are skipped when IPv6 is disabled.
+    """
+    port_map = new_port_map()
+    for socket_protocol, paths in PROC_NET_TABLES.items():
+        for index, path in enumerate(paths):
+            try:
+                with open(path, 'rb') as table:
+                    content = table.read()
+            except OSError:
+                if index == 0:
+                    return None
+                continue
+            parse_proc_net(content, socket_protocol, port_map)
+    return port_map
+
+
+def get_ports_in_use(module: AnsibleModule) -> dict[str, bytearray]:
+    """
+    Fetch TCP and UDP sockets from /proc/net, or from ``ss`` where it is not
+    available.
+    """
+    port_map = read_proc_net()
+    if port_map is not None:
+        return port_map
+
     ss_path = module.get_bin_path('ss', required=True)
     rc, stdout, stderr = module.run_command([ss_path, '-Htuan'])
     if rc != 0:
         module.fail_json(msg=f"Failed to execute ss command: {stderr.strip() or stdout.strip()}")
 
-    return parse_ports_in_use(stdout, protocol)
+    port_map = new_port_map()
+    parse_ports_in_use(stdout, port_map)
+    return port_map
+
+
+class DockerSocketConnection(http.client.HTTPConnection):
+    """
+    HTTP connection to the Docker Engine API over its UNIX socket.
+    """
+
+    def __init__(self, socket_path: str, timeout: float) -> None:
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def docker_get(path: str, socket_path: str = DOCKER_SOCKET, allow_missing: bool = False) -> Any:
+    """
+    Make a GET request to the Docker Engine API and return the decoded JSON.
+
+    With allow_missing, a 404 returns None instead of raising.
+    """
+    connection = DockerSocketConnection(socket_path, DOCKER_TIMEOUT)
+    try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        body = response.read()
+    finally:
+        connection.close()
+
+    if allow_missing and response.status == 404:
+        return None
+    if response.status != 200:
+        raise OSError(f"Docker API returned HTTP {response.status} for {path}")
+    return json.loads(body)
+
+
+def list_docker_containers(include_stopped: bool, socket_path: str = DOCKER_SOCKET) -> list[dict[str, Any]] | None:
+    """
+    List containers with a single Docker Engine API call.
+
+    Returns:
+        list: Container summaries, or None if Docker is not installed
+    """
+    if not os.path.exists(socket_path):
+        return None
+
+    containers = docker_get('/containers/json?all=1' if include_stopped else '/containers/json', socket_path)
+    if not isinstance(containers, list):
+        raise ValueError("Unexpected Docker API response")
+    return containers
+
+
+def parse_host_ports(host_port: Any) -> range:
+    """
+    Return the ports of a HostPort binding, which is empty for a random port
+    and may be a range such as "8000-8010".
+    """
+    first, _, last = str(host_port or '').partition('-')
+    if not first.isdigit() or (last and not last.isdigit()):
+        return range(0)
+    return range(max(int(first), 1), min(int(last or first), 65535) + 1)
+
+
+def mark_docker_ports(
+    containers: list[dict[str, Any]],
+    port_map: dict[str, bytearray],
+    socket_path: str = DOCKER_SOCKET
+) -> None:
+    """
+    Mark the host ports bound by containers.
+
+    Running containers carry their published ports in the list response.
+    Stopped containers do not, so their configured port bindings are read
+    with an inspect of only those containers. A container removed after it
+    was listed is skipped.
+    """
+    for container in containers:
+        if container.get('State', 'running') == 'running':
+            for binding in container.get('Ports') or []:
+                port = binding.get('PublicPort')
+                socket_protocol = binding.get('Type')
+                if socket_protocol in port_map and isinstance(port, int) and 1 <= port <= 65535:
+                    port_map[socket_protocol][port] = 1
+            continue
+
+        details = docker_get(f"/containers/{container['Id']}/json", socket_path, allow_missing=True)
+        if details is None:
+            continue
+        port_bindings = (details.get('HostConfig') or {}).get('PortBindings') or {}
+        for container_port, bindings in port_bindings.items():
+            socket_protocol = container_port.partition('/')[2] or 'tcp'
+            if socket_protocol not in port_map:
+                continue
+            for binding in bindings or []:
+                for port in parse_host_ports(binding.get('HostPort')):
+                    port_map[socket_protocol][port] = 1
+
+
+def add_docker_ports(module: AnsibleModule, port_map: dict[str, bytearray], include_stopped: bool) -> None:
+    """
+    Mark the ports bound by Docker containers.
+
+    Errors fail the module when Docker awareness was requested and are only
+    reported as a warning when the ports are just checked for reservations.
+    """
+    try:
+        containers = list_docker_containers(include_stopped)
+        if containers:
+            mark_docker_ports(containers, port_map)
+    except (OSError, ValueError, KeyError, http.client.HTTPException) as e:
+        if include_stopped:
+            module.fail_json(msg=f"Failed to list Docker port bindings: {e}")
+        module.warn(f"Could not list Docker containers, published ports are not checked: {e}")
+
+
+def ports_taken(port_map: dict[str, bytearray], protocol: str) -> bytearray:
+    """
+    Combine the bitmaps of the requested protocols.
+    """
+    if protocol != 'both':
+        return port_map[protocol]
+    combined = int.from_bytes(port_map['tcp'], 'little') | int.from_bytes(port_map['udp'], 'little')
+    return bytearray(combined.to_bytes(PORT_COUNT, 'little'))
+
+
+def find_free_ports(taken: bytearray, low_bound: int, high_bound: int, count: int) -> list[int]:
+    """
+    Return up to count free ports in ascending order, scanning the bitmap once.
+    """
+    ports: list[int] = []
+    start = low_bound
+    while len(ports) < count:
+        port = taken.find(0, start, high_bound + 1)
+        if port == -1:
+            break
+        ports.append(port)
+        start = port + 1
+    return ports
+
+
+@contextmanager
+def reservation_lock(reservation_file: str) -> Iterator[None]:
+    """
+    Hold an exclusive lock on the reservations while they are read and updated.
+
+    A separate lock file is used because the reservation file itself is
+    replaced on every update.
+    """
+    fd = os.open(f"{reservation_file}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def read_reservations(reservation_file: str) -> list[dict[str, Any]]:
+    try:
+        with open(reservation_file, 'r', encoding='utf-8') as handle:
+            content = handle.read()
+    except FileNotFoundError:
+        return []
+
+    if not content.strip():
+        return []
+    data = json.loads(content)
+    reservations = data.get('reservations') if isinstance(data, dict) else None
+    if not isinstance(reservations, list):
+        raise ValueError(f"Reservation file '{reservation_file}' has no 'reservations' list")
+    return reservations
 
 
-def find_port(module: AnsibleModule, low_bound: int, high_bound: int, protocol: str) -> tuple[bool, dict[str, object]]:
+def write_reservations(reservation_file: str, reservations: list[dict[str, Any]]) -> None:
+    directory = os.path.dirname(reservation_file) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.find_open_port.')
     try:
-        if low_bound < 1:
-            module.fail_json(msg="Low bound must be at least 1")
-        if high_bound > 65535:
-            module.fail_json(msg="High bound must be at most 65535")
-        if high_bound < low_bound:
-            module.fail_json(msg="High bound must be greater than or equal to low bound")
-
-        seq = set(range(low_bound, high_bound + 1))
-        ports_in_use = get_ports_in_use(module, protocol)
-        available_ports = seq - ports_in_use
-
-        if available_ports:
-            candidate = min(available_ports)
-            return False, {"port": candidate}
+        with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+            json.dump({'reservations': reservations}, handle, indent=2)
+            handle.write('\n')
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, reservation_file)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def active_reservations(
+    reservations: list[dict[str, Any]],
+    port_map: dict[str, bytearray],
+    now: float
+) -> list[dict[str, Any]]:
+    """
+    Drop reservations that expired, are malformed, or whose port is now taken.
+    """
+    active: list[dict[str, Any]] = []
+    for reservation in reservations:
+        if not isinstance(reservation, dict):
+            continue
+        try:
+            port = int(reservation['port'])
+            protocol = str(reservation.get('protocol', 'both'))
+            expires = float(reservation['expires'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if expires <= now or not 1 <= port <= 65535 or protocol not in ('tcp', 'udp', 'both'):
+            continue
+        if any(port_map[name][port] for name in protocol_names(protocol)):
+            continue
+        active.append(dict(port=port, protocol=protocol, owner=str(reservation.get('owner', '')), expires=expires))
+    return active
+
+
+def validate_bounds(module: AnsibleModule, low_bound: int, high_bound: int, count: int) -> None:
+    if low_bound < 1:
+        module.fail_json(msg="Low bound must be at least 1")
+    if high_bound > 65535:
+        module.fail_json(msg="High bound must be at most 65535")
+    if high_bound < low_bound:
+        module.fail_json(msg="High bound must be greater than or equal to low bound")
+    if count < 1:
+        module.fail_json(msg="Count must be at least 1")
+
+
+def select_ports(taken: bytearray, low_bound: int, high_bound: int, count: int) -> tuple[bool, dict[str, object]]:
+    ports = find_free_ports(taken, low_bound, high_bound, count)
+    if not ports:
         return True, {"msg": "No available port found in the specified range"}
+    if len(ports) < count:
+        return True, {"msg": f"Only {len(ports)} of {count} ports are available in the specified range", "ports": ports}
+    return False, {"port": ports[0], "ports": ports}
 
+
+def reserve_ports(
+    module: AnsibleModule,
+    port_map: dict[str, bytearray],
+    low_bound: int,
+    high_bound: int,
+    protocol: str,
+    count: int
+) -> tuple[bool, bool, dict[str, object]]:
+    """
+    Select ports while holding the reservation lock and record them.
+
+    Returns whether selection failed, whether the reservation file was
+    rewritten (never in check mode) and the result.
+    """
+    reservation_file: str = module.params['reservation_file']
+    owner: str = module.params['reservation_owner']
+
+    with reservation_lock(reservation_file):
+        now = time.time()
+        reservations = active_reservations(read_reservations(reservation_file), port_map, now)
+        if owner:
+            # Repeated runs for the same owner replace its earlier reservations.
+            reservations = [reservation for reservation in reservations if reservation['owner'] != owner]
+
+        for reservation in reservations:
+            for name in protocol_names(reservation['protocol']):
+                port_map[name][reservation['port']] = 1
+
+        is_error, result = select_ports(ports_taken(port_map, protocol), low_bound, high_bound, count)
+        if is_error or module.check_mode:
+            return is_error, False, result
+
+        expires = now + module.params['reservation_ttl']
+        reservations.extend(
+            dict(port=port, protocol=protocol, owner=owner, expires=expires) for port in result['ports']
+        )
+        write_reservations(reservation_file, sorted(reservations, key=lambda reservation: reservation['port']))
+
+    return is_error, True, result
+
+
+def find_port(
+    module: AnsibleModule,
+    low_bound: int,
+    high_bound: int,
+    protocol: str,
+    count: int = 1
+) -> tuple[bool, bool, dict[str, object]]:
+    validate_bounds(module, low_bound, high_bound, count)
+
+    try:
+        port_map = get_ports_in_use(module)
     except ValueError as e:
         module.fail_json(msg=f"Failed to parse ss output: {e}")
 
+    # Published ports also count as taken when checking reservations, which
+    # covers hosts where Docker publishes ports without a listening proxy.
+    if module.params.get('docker') or module.params.get('reservation_file'):
+        add_docker_ports(module, port_map, bool(module.params.get('docker')))
+
+    if not module.params.get('reservation_file'):
+        is_error, result = select_ports(ports_taken(port_map, protocol), low_bound, high_bound, count)
+        return is_error, False, result
+
+    try:
+        return reserve_ports(module, port_map, low_bound, high_bound, protocol, count)
+    except (OSError, ValueError) as e:
+        module.fail_json(msg=f"Failed to update reservation file: {e}")
+
+
 def main() -> None:
     module = AnsibleModule(
         argument_spec=dict(
             low_bound=dict(type='int', required=True),
             high_bound=dict(type='int', required=True),
             protocol=dict(type='str', default='both', choices=['tcp', 'udp', 'both']),
+            count=dict(type='int', default=1),
+            docker=dict(type='bool', default=False),
+            reservation_file=dict(type='path', required=False),
+            reservation_owner=dict(type='str', default=''),
+            reservation_ttl=dict(type='int', default=3600),
         ),
         supports_check_mode=True
     )
 
-    is_error, result = find_port(module, module.params['low_bound'], module.params['high_bound'], module.params['protocol'])
+    is_error, changed, result = find_port(
+        module,
+        module.params['low_bound'],
+        module.params['high_bound'],
+        module.params['protocol'],
+        module.params['count']
+    )
 
     if not is_error:
-        module.exit_json(changed=False, meta=result)
+        module.exit_json(changed=changed, meta=result)
     else:
         module.fail_json(msg="Error finding port", meta=result)
 
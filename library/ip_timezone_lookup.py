@@ -8,6 +8,9 @@ module: ip_timezone_lookup
 description:
     - Fetches timezone information for a public IP address from multiple IP geolocation services.
     - Returns a consensus timezone when multiple sources agree.
+    - Queries the best scoring sources first, scored on their recent success rate, median latency and agreement with the consensus, and the others only when needed.
+    - Stops as soon as C(min_consensus) sources agree on a unique timezone with at least medium confidence and cancels the remaining requests.
+    - Caches a consensus per IP address on disk, so later runs do not query the sources again.
     - Provides individual results from each source for verification.
     - Returns only installed IANA timezone identifiers suitable for C(timedatectl).
 author: salty
@@ -30,6 +33,34 @@ options:
         required: false
         default: 2
         type: int
+    early_exit:
+        description:
+            - Return once C(min_consensus) sources agree on a unique timezone instead of waiting for every source.
+        required: false
+        default: true
+        type: bool
+    initial_sources:
+        description:
+            - Number of best scoring sources queried first.
+            - The remaining sources are queried once consensus can no longer be reached without them.
+            - Set to 0 to query every source at once.
+        required: false
+        default: 5
+        type: int
+    cache_path:
+        description:
+            - JSON file caching the consensus for each IP address and the recent outcomes used to score the sources.
+            - The cache is skipped when the parent directory does not exist.
+        required: false
+        default: /opt/saltbox/ip_timezone_cache.json
+        type: path
+    cache_ttl:
+        description:
+            - Seconds a cached consensus is used before the sources are queried again.
+            - Set to 0 to disable caching the consensus; source scores are still kept.
+        required: false
+        default: 86400
+        type: int
 """
 
 EXAMPLES = """
@@ -68,7 +99,7 @@ consensus_count:
     returned: always
     sample: 11
 total_sources:
-    description: Total number of sources queried
+    description: Total number of sources queried, including those cancelled after consensus
     type: int
     returned: always
     sample: 11
@@ -85,6 +116,17 @@ sources:
         "ipapi_co": {"timezone": "Europe/Helsinki", "success": true},
         "ipinfo": {"timezone": "Europe/Helsinki", "success": true}
     }
+cancelled_sources:
+    description: Sources whose requests were cancelled once consensus was reached
+    type: list
+    elements: str
+    returned: always
+    sample: ["ipregistry", "ipaddress_to"]
+cached:
+    description: Whether the result was taken from the cache instead of querying the sources
+    type: bool
+    returned: always
+    sample: false
 ip_used:
     description: The IP address that was looked up
     type: str
@@ -97,6 +139,8 @@ from collections import Counter
 import ipaddress
 import json
 import os
+import tempfile
+import time
 from typing import Any, Awaitable, Callable, Optional
 
 from ansible.module_utils.basic import AnsibleModule, missing_required_lib
@@ -113,6 +157,15 @@ else:
 ZONEINFO_ROOT = '/usr/share/zoneinfo'
 EXCLUDED_ZONEINFO_PREFIXES = ('posix/', 'right/')
 
+DEFAULT_CACHE_PATH = '/opt/saltbox/ip_timezone_cache.json'
+DEFAULT_CACHE_TTL = 86400
+
+CACHED_FIELDS = ('timezone', 'confidence', 'consensus_count', 'total_sources', 'successful_lookups', 'sources')
+
+DEFAULT_INITIAL_SOURCES = 5
+# Number of recent lookups kept per provider for scoring
+SCORE_HISTORY = 20
+
 
 class LookupRequestError(Exception):
     """A concise error suitable for an individual source result."""
@@ -148,6 +201,127 @@ def validate_timezone(timezone: object) -> Optional[str]:
         return None
 
 
+def cache_available(path: str) -> bool:
+    return bool(path) and os.path.isdir(os.path.dirname(path) or '.')
+
+
+def read_cache(path: str) -> dict[str, Any]:
+    try:
+        with open(path, 'r', encoding='utf-8') as cache_file:
+            data = json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def write_cache(path: str, data: dict[str, Any]) -> None:
+    """Atomically replace the cache file, ignoring failures."""
+    directory = os.path.dirname(path) or '.'
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.ip_timezone_cache.')
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as cache_file:
+            json.dump(data, cache_file, indent=2, sort_keys=True)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+
+def get_cached_lookup(data: dict[str, Any], ttl: int, ip_address: str) -> Optional[dict[str, Any]]:
+    """
+    Return the cached consensus for an IP address, or None if it is missing,
+    expired or names a timezone that is no longer installed.
+    """
+    if ttl <= 0:
+        return None
+    lookups = data.get('lookups')
+    entry = lookups.get(ip_address) if isinstance(lookups, dict) else None
+    if not isinstance(entry, dict):
+        return None
+    try:
+        if float(entry['expires']) <= time.time():
+            return None
+    except (KeyError, TypeError, ValueError):
+        return None
+    if any(field not in entry for field in CACHED_FIELDS) or not validate_timezone(entry['timezone']):
+        return None
+    return {field: entry[field] for field in CACHED_FIELDS}
+
+
+def store_lookup(data: dict[str, Any], ttl: int, ip_address: str, result: dict[str, Any]) -> None:
+    """Cache a consensus for an IP address, dropping expired entries."""
+    if ttl <= 0:
+        return
+    now = time.time()
+    lookups = data.get('lookups')
+    data['lookups'] = {
+        ip: entry for ip, entry in (lookups.items() if isinstance(lookups, dict) else ())
+        if isinstance(entry, dict) and isinstance(entry.get('expires'), (int, float)) and entry['expires'] > now
+    }
+    entry: dict[str, Any] = {field: result[field] for field in CACHED_FIELDS}
+    entry['expires'] = now + ttl
+    data['lookups'][ip_address] = entry
+
+
+def provider_samples(data: dict[str, Any], source_name: str) -> list[list[Any]]:
+    """
+    Return the recorded outcomes of a provider as [success, agreed, latency]
+    lists, skipping malformed entries. agreed is None when the run had no
+    consensus or the lookup failed.
+    """
+    providers = data.get('providers')
+    samples = providers.get(source_name) if isinstance(providers, dict) else None
+    if not isinstance(samples, list):
+        return []
+    return [
+        sample for sample in samples
+        if isinstance(sample, list) and len(sample) == 3
+        and isinstance(sample[0], bool)
+        and sample[1] in (True, False, None)
+        and isinstance(sample[2], (int, float))
+    ]
+
+
+def provider_score(samples: list[list[Any]]) -> float:
+    """
+    Score a provider from its recent outcomes, higher being better.
+
+    The score is the share of lookups that returned the consensus timezone,
+    smoothed so that providers without history start in the middle and are
+    still tried, divided by one plus the median latency of its successful
+    lookups in seconds. Successful lookups from runs without a consensus
+    count as half agreeing, and lookups cancelled once consensus was reached
+    count as failed, so slow providers move down.
+    """
+    agreement = sum(1.0 if agreed else 0.5 if agreed is None else 0.0 for success, agreed, _ in samples if success)
+    latencies = sorted(latency for success, _, latency in samples if success)
+    p50 = latencies[len(latencies) // 2] if latencies else 0.0
+    return (agreement + 1) / (len(samples) + 2) / (1 + p50)
+
+
+def record_provider_samples(
+    data: dict[str, Any],
+    results: dict[str, dict[str, object]],
+    latencies: dict[str, float],
+    cancelled: list[str],
+    consensus_tz: Optional[str]
+) -> None:
+    """Append the outcome of every started lookup to its provider's history."""
+    providers = data.get('providers')
+    data['providers'] = providers = providers if isinstance(providers, dict) else {}
+    outcomes = [(source_name, bool(result['success']), result['timezone']) for source_name, result in results.items()]
+    outcomes.extend((source_name, False, None) for source_name in cancelled)
+    for source_name, success, timezone in outcomes:
+        agreed = None if consensus_tz is None or not success else timezone == consensus_tz
+        samples = provider_samples(data, source_name)
+        samples.append([success, agreed, round(latencies.get(source_name, 0.0), 3)])
+        providers[source_name] = samples[-SCORE_HISTORY:]
+
+
 class IPTimezoneLookup:
     SOURCE_METHODS = (
         ('ipinfo', 'fetch_ipinfo'),
@@ -163,13 +337,18 @@ class IPTimezoneLookup:
         ('ipaddress_to', 'fetch_ipaddress_to'),
     )
 
-    def __init__(self, module: AnsibleModule) -> None:
+    def __init__(self, module: AnsibleModule, scores: Optional[dict[str, float]] = None) -> None:
         self.module: AnsibleModule = module
         self.ip_address: str = module.params['ip_address']
         self.timeout: int = module.params['timeout']
         self.min_consensus: int = module.params['min_consensus']
+        self.early_exit: bool = module.params['early_exit']
+        self.initial_sources: int = module.params['initial_sources']
+        self.scores: dict[str, float] = scores or {}
         self.results: dict[str, dict[str, object]] = {}
-        
+        self.latencies: dict[str, float] = {}
+        self.cancelled: list[str] = []
+
     async def make_request(self, session: aiohttp.ClientSession, url: str, headers: Optional[dict[str, str]] = None) -> dict[str, Any]:
         """Make an HTTP request and retain a useful failure reason."""
         try:
@@ -292,6 +471,7 @@ class IPTimezoneLookup:
         lookup_func: Callable[[aiohttp.ClientSession], Awaitable[Optional[str]]]
     ) -> tuple[str, dict[str, object]]:
         """Fetch timezone from a single source with error handling"""
+        started = time.monotonic()
         try:
             timezone = await lookup_func(session)
             validated_timezone = validate_timezone(timezone)
@@ -317,25 +497,70 @@ class IPTimezoneLookup:
                 'success': False,
                 'error': str(e)
             }
+        finally:
+            self.latencies[source_name] = time.monotonic() - started
+
+    def ordered_sources(self) -> list[str]:
+        """Return the source names best score first, keeping the declared order on ties."""
+        default_score = provider_score([])
+        return sorted(
+            (source_name for source_name, _ in self.SOURCE_METHODS),
+            key=lambda source_name: -self.scores.get(source_name, default_score)
+        )
 
     async def _run_lookups_async(self) -> None:
-        """Run all timezone lookups concurrently"""
-        lookup_methods = {
-            source_name: getattr(self, method_name)
-            for source_name, method_name in self.SOURCE_METHODS
-        }
-
-        # Create aiohttp session and run all lookups concurrently
-        async with aiohttp.ClientSession() as session:
-            tasks = [
-                self._fetch_from_source(session, source_name, lookup_func)
-                for source_name, lookup_func in lookup_methods.items()
-            ]
-            results = await asyncio.gather(*tasks)
-
-            # Store results
-            for source_name, result in results:
-                self.results[source_name] = result
+        """
+        Run the timezone lookups concurrently over one session.
+
+        The initial_sources best scoring sources are queried first and the
+        rest only once consensus can no longer be reached without them.
+        Results are recorded as they arrive. With early_exit, the lookups
+        still running are cancelled once the answers so far give a unique
+        consensus with at least medium confidence.
+        """
+        methods = dict(self.SOURCE_METHODS)
+        ordered = self.ordered_sources()
+        if 0 < self.initial_sources < len(ordered):
+            fallback = ordered[self.initial_sources:]
+            ordered = ordered[:self.initial_sources]
+        else:
+            fallback = []
+
+        # At most one connection per source
+        connector = aiohttp.TCPConnector(limit=len(self.SOURCE_METHODS))
+        async with aiohttp.ClientSession(connector=connector) as session:
+            tasks: dict[asyncio.Future[tuple[str, dict[str, object]]], str] = {}
+
+            def start(source_names: list[str]) -> set[asyncio.Future[tuple[str, dict[str, object]]]]:
+                started = {
+                    asyncio.ensure_future(
+                        self._fetch_from_source(session, source_name, getattr(self, methods[source_name]))
+                    ): source_name
+                    for source_name in source_names
+                }
+                tasks.update(started)
+                return set(started)
+
+            pending = start(ordered)
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        source_name, result = task.result()
+                        self.results[source_name] = result
+                    consensus_tz, confidence, consensus_count = self.determine_consensus()
+                    if consensus_tz is not None and confidence != 'low' and (self.early_exit or not pending):
+                        break
+                    if fallback and (not pending or consensus_count + len(pending) < self.min_consensus):
+                        pending |= start(fallback)
+                        fallback = []
+            finally:
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    await asyncio.gather(*pending, return_exceptions=True)
+
+            self.cancelled = [tasks[task] for task in tasks if task in pending]
 
     def run_lookups(self) -> None:
         """Run all timezone lookups (synchronous wrapper for async operations)"""
@@ -385,13 +610,21 @@ def main() -> None:
         argument_spec=dict(
             ip_address=dict(type='str', required=True),
             timeout=dict(type='int', default=5),
-            min_consensus=dict(type='int', default=2)
+            min_consensus=dict(type='int', default=2),
+            early_exit=dict(type='bool', default=True),
+            initial_sources=dict(type='int', default=DEFAULT_INITIAL_SOURCES),
+            cache_path=dict(type='path', default=DEFAULT_CACHE_PATH),
+            cache_ttl=dict(type='int', default=DEFAULT_CACHE_TTL)
         ),
         supports_check_mode=True
     )
 
     if module.params['timeout'] <= 0:
         module.fail_json(msg="timeout must be a positive integer")
+    if module.params['initial_sources'] < 0:
+        module.fail_json(msg="initial_sources must not be negative")
+    if module.params['cache_ttl'] < 0:
+        module.fail_json(msg="cache_ttl must not be negative")
     if module.params['min_consensus'] < 1:
         module.fail_json(msg="min_consensus must be at least 1")
     if module.params['min_consensus'] > len(IPTimezoneLookup.SOURCE_METHODS):
@@ -412,8 +645,20 @@ def main() -> None:
     if not ip_address.is_global:
         module.fail_json(msg=f"ip_address '{ip_address}' is not a public IP address")
     module.params['ip_address'] = str(ip_address)
-    
-    lookup = IPTimezoneLookup(module)
+
+    cache_path: str = module.params['cache_path'] or ''
+    cache_ttl: int = module.params['cache_ttl']
+    use_cache = cache_available(cache_path)
+    cache_data = read_cache(cache_path) if use_cache else {}
+    cached = get_cached_lookup(cache_data, cache_ttl, module.params['ip_address'])
+    if cached is not None:
+        module.exit_json(changed=False, cancelled_sources=[], cached=True, ip_used=module.params['ip_address'], **cached)
+
+    scores = {
+        source_name: provider_score(provider_samples(cache_data, source_name))
+        for source_name, _ in IPTimezoneLookup.SOURCE_METHODS
+    }
+    lookup = IPTimezoneLookup(module, scores)
     lookup.run_lookups()
     
     consensus_tz, confidence, consensus_count = lookup.determine_consensus()
@@ -425,12 +670,20 @@ def main() -> None:
         'timezone': consensus_tz,
         'confidence': confidence,
         'consensus_count': consensus_count,
-        'total_sources': len(lookup.results),
+        'total_sources': len(lookup.results) + len(lookup.cancelled),
         'successful_lookups': successful_lookups,
         'sources': lookup.results,
+        'cancelled_sources': lookup.cancelled,
+        'cached': False,
         'ip_used': lookup.ip_address
     }
     
+    if use_cache:
+        record_provider_samples(cache_data, lookup.results, lookup.latencies, lookup.cancelled, consensus_tz)
+        if consensus_tz:
+            store_lookup(cache_data, cache_ttl, lookup.ip_address, result)
+        write_cache(cache_path, cache_data)
+
     if consensus_tz:
         module.exit_json(**result)
 
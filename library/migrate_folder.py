@@ -13,7 +13,7 @@ description:
     - Errors if both old and new locations exist to prevent potential data merging issues or loss.
     - Errors if the legacy path exists but is not a directory.
     - Errors if the new path exists but is not a directory.
-    - Errors before migration when the source and destination are on different filesystems.
+    - Errors before migration when the source and destination are on different filesystems, unless C(cross_device) is enabled.
 author: salty
 options:
     legacy_path:
@@ -46,6 +46,34 @@ options:
             Recursively set ownership for contents of the directory.
             Symbolic links are not followed.
             Mode changes are not applied recursively.
+            Entries that already have the requested owner and group are not touched.
+        required: false
+        type: bool
+        default: false
+    workers:
+        description: >
+            Number of threads walking directories in parallel when C(recurse) is set,
+            and copying files in parallel when migrating across filesystems.
+        required: false
+        type: int
+        default: 8
+    cross_device:
+        description:
+            - Allow migrating when the legacy and new paths are on different filesystems.
+            - The tree is copied into a hidden staging directory next to the new path, using
+              C(copy_file_range) or C(sendfile), with ownership, permissions, timestamps and
+              extended attributes preserved. Hard links are copied as separate files.
+            - Copied files are verified by size, permissions and ownership (and by checksum with C(verify_checksum))
+              before the staging directory is renamed to the new path and the legacy path is removed.
+            - Progress is recorded in a hidden sidecar file next to the new path. An interrupted
+              migration resumes when the task runs again, skipping files that were already copied.
+        required: false
+        type: bool
+        default: false
+    verify_checksum:
+        description: >
+            Compare SHA-256 checksums of every copied file before removing the legacy path
+            when migrating across filesystems.
         required: false
         type: bool
         default: false
@@ -60,6 +88,15 @@ EXAMPLES = """
     group: www-data
     mode: '0775'
     recurse: true
+
+- name: Migrate appdata to a new disk
+  migrate_folder:
+    legacy_path: /opt
+    new_path: /mnt/appdata/opt
+    owner: seed
+    group: seed
+    cross_device: true
+    verify_checksum: true
 """
 
 RETURN = """
@@ -93,14 +130,48 @@ mode:
     type: str
     returned: on success
     sample: "0775"
+files_copied:
+    description: Number of files copied by a cross-filesystem migration during this run.
+    type: int
+    returned: when migrating across filesystems
+    sample: 5120
+bytes_copied:
+    description: Number of bytes copied by a cross-filesystem migration during this run.
+    type: int
+    returned: when migrating across filesystems
+    sample: 1073741824
+files_resumed:
+    description: Number of files already copied by an interrupted earlier run.
+    type: int
+    returned: when migrating across filesystems
+    sample: 0
+entries_scanned:
+    description: Number of entries below the directory checked for ownership.
+    type: int
+    returned: when recurse is set with an owner or group
+    sample: 15230
+entries_changed:
+    description: Number of entries below the directory whose ownership was changed.
+    type: int
+    returned: when recurse is set with an owner or group
+    sample: 12
 """
 
+import errno
+import hashlib
+import json
 import os
 import pwd
 import grp
+import shutil
 import stat
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.saltbox_ownership import DEFAULT_WORKERS, chown_tree
 
 
 # Helper to safely get UID/GID
@@ -149,25 +220,400 @@ def get_existing_parent(path: str) -> str:
     return parent
 
 
-def set_recursive_ownership(
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+# Seconds between progress updates of the migration sidecar file.
+STATE_WRITE_INTERVAL = 5.0
+# Pending file copies per worker before the walk waits for some to finish.
+COPY_QUEUE_DEPTH = 64
+
+
+def migration_paths(new_path: str) -> tuple[str, str]:
+    """
+    Return the staging directory and sidecar state file of a cross-filesystem migration.
+
+    Both live next to the new path, so the staging directory is on the
+    destination filesystem and can be renamed into place.
+    """
+    parent, name = os.path.split(new_path)
+    return (
+        os.path.join(parent, f'.{name}.migrate_folder.partial'),
+        os.path.join(parent, f'.{name}.migrate_folder.json'),
+    )
+
+
+def read_migration_state(state_path: str) -> dict[str, Any] | None:
+    """
+    Read the sidecar state file, returning None if there is none.
+    """
+    try:
+        with open(state_path, 'r', encoding='utf-8') as state_file:
+            state = json.load(state_file)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        raise RuntimeError(f"Unable to read migration state '{state_path}': {str(e)}") from e
+    if not isinstance(state, dict):
+        raise RuntimeError(f"Migration state '{state_path}' is not a JSON object")
+    return state
+
+
+def write_migration_state(state_path: str, state: dict[str, Any]) -> None:
+    """
+    Atomically replace the sidecar state file.
+    """
+    state['updated'] = time.time()
+    directory = os.path.dirname(state_path)
+    temp_fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.migrate_folder.')
+    try:
+        with os.fdopen(temp_fd, 'w', encoding='utf-8') as temp_file:
+            json.dump(state, temp_file, sort_keys=True)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, state_path)
+    except Exception:
+        if os.path.lexists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def copy_file_data(source: str, destination: str) -> int:
+    """
+    Copy file contents in the kernel, preferring copy_file_range over sendfile.
+
+    copy_file_range is refused across filesystems by some kernels and
+    filesystems, in which case the copy continues with sendfile from the
+    current offset, and finally with a userspace copy. Some filesystems
+    report nothing copied instead of failing, so a kernel copy returning 0
+    before any data was written falls back the same way, as shutil does.
+
+    Returns:
+        int: Number of bytes copied
+    """
+    copied = 0
+    with open(source, 'rb', buffering=0) as source_file, open(destination, 'wb', buffering=0) as destination_file:
+        source_fd = source_file.fileno()
+        destination_fd = destination_file.fileno()
+        use_copy_file_range = hasattr(os, 'copy_file_range')
+        use_sendfile = True
+
+        while True:
+            try:
+                if use_copy_file_range:
+                    count = os.copy_file_range(source_fd, destination_fd, COPY_CHUNK_SIZE)
+                elif use_sendfile:
+                    count = os.sendfile(destination_fd, source_fd, None, COPY_CHUNK_SIZE)
+                else:
+                    chunk = source_file.read(COPY_CHUNK_SIZE)
+                    count = len(chunk)
+                    if count:
+                        destination_file.write(chunk)
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                    raise
+                if use_copy_file_range:
+                    use_copy_file_range = False
+                elif use_sendfile:
+                    use_sendfile = False
+                else:
+                    raise
+                continue
+            if count == 0:
+                if copied == 0 and use_copy_file_range:
+                    use_copy_file_range = False
+                    continue
+                if copied == 0 and use_sendfile:
+                    use_sendfile = False
+                    continue
+                break
+            copied += count
+
+    return copied
+
+
+def copy_metadata(source: str, destination: str, source_stat: os.stat_result) -> None:
+    """
+    Copy ownership, permissions, timestamps and extended attributes without following links.
+
+    shutil.copystat sets the timestamps before the extended attributes and
+    permissions, so they are set once more at the end. A matching
+    modification time then means every metadata step completed.
+    """
+    os.lchown(destination, source_stat.st_uid, source_stat.st_gid)
+    shutil.copystat(source, destination, follow_symlinks=False)
+    os.utime(destination, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns), follow_symlinks=False)
+
+
+def metadata_matches(destination_stat: os.stat_result, source_stat: os.stat_result) -> bool:
+    """
+    Check if a copy has the permissions and ownership of its source.
+    """
+    return (
+        stat.S_IMODE(destination_stat.st_mode) == stat.S_IMODE(source_stat.st_mode)
+        and destination_stat.st_uid == source_stat.st_uid
+        and destination_stat.st_gid == source_stat.st_gid
+    )
+
+
+def is_copied(destination: str, source_stat: os.stat_result) -> bool:
+    """
+    Check if an earlier run already finished copying a regular file.
+
+    Timestamps are set last, so a matching size and modification time mean
+    the copy completed. Permissions and ownership are compared as well.
+    """
+    try:
+        destination_stat = os.lstat(destination)
+    except FileNotFoundError:
+        return False
+    return (
+        stat.S_ISREG(destination_stat.st_mode)
+        and destination_stat.st_size == source_stat.st_size
+        and destination_stat.st_mtime_ns == source_stat.st_mtime_ns
+        and metadata_matches(destination_stat, source_stat)
+    )
+
+
+def copy_file(source: str, destination: str, source_stat: os.stat_result) -> tuple[int, bool]:
+    """
+    Copy a regular file with its metadata unless an earlier run already did.
+
+    Returns:
+        tuple: (bytes copied, True if the file was already copied)
+    """
+    if is_copied(destination, source_stat):
+        return 0, True
+    if os.path.lexists(destination) and not stat.S_ISREG(os.lstat(destination).st_mode):
+        remove_path(destination)
+    copied = copy_file_data(source, destination)
+    copy_metadata(source, destination, source_stat)
+    return copied, False
+
+
+def remove_path(path: str) -> None:
+    """
+    Remove a file, link or directory tree without following links.
+    """
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.unlink(path)
+
+
+def copy_special(module: AnsibleModule, source: str, destination: str, source_stat: os.stat_result) -> None:
+    """
+    Recreate a symbolic link, FIFO or device node. Sockets are skipped.
+    """
+    if stat.S_ISSOCK(source_stat.st_mode):
+        module.warn(f"Skipping socket '{source}'; sockets are recreated by the applications using them.")
+        return
+    if os.path.lexists(destination):
+        remove_path(destination)
+    if stat.S_ISLNK(source_stat.st_mode):
+        os.symlink(os.readlink(source), destination)
+    elif stat.S_ISFIFO(source_stat.st_mode):
+        os.mkfifo(destination, stat.S_IMODE(source_stat.st_mode))
+    else:
+        os.mknod(destination, source_stat.st_mode, source_stat.st_rdev)
+    copy_metadata(source, destination, source_stat)
+
+
+def file_checksum(path: str) -> str:
+    """
+    Return the SHA-256 hex digest of a file.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as checked_file:
+        for chunk in iter(lambda: checked_file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify_file(source: str, destination: str, verify_checksum: bool) -> str | None:
+    """
+    Compare a copied file with its source.
+
+    A mismatching copy is removed, so the next run copies it again.
+
+    Returns:
+        str: Description of the mismatch, or None if the copy is intact
+    """
+    source_stat = os.lstat(source)
+    try:
+        destination_stat = os.lstat(destination)
+    except FileNotFoundError:
+        return f"'{destination}' is missing"
+
+    problem = None
+    if destination_stat.st_size != source_stat.st_size:
+        problem = f"'{destination}' has {destination_stat.st_size} bytes instead of {source_stat.st_size}"
+    elif not metadata_matches(destination_stat, source_stat):
+        problem = f"'{destination}' does not have the permissions or ownership of '{source}'"
+    elif verify_checksum and file_checksum(source) != file_checksum(destination):
+        problem = f"'{destination}' does not match the checksum of '{source}'"
+    if problem is not None:
+        os.unlink(destination)
+    return problem
+
+
+def drain(pending: set[Future[Any]], limit: int) -> tuple[set[Future[Any]], list[Any]]:
+    """
+    Wait until at most limit futures are pending, returning the finished results.
+    """
+    results: list[Any] = []
+    while len(pending) > limit:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        results.extend(future.result() for future in done)
+    return pending, results
+
+
+def copy_across_filesystems(
     module: AnsibleModule,
-    path: str,
-    owner: str | None,
-    group: str | None,
-    changed: bool
-) -> bool:
+    source: str,
+    new_path: str,
+    workers: int,
+    verify_checksum: bool
+) -> dict[str, int]:
     """
-    Recursively apply owner and group without following symbolic links.
+    Copy a directory tree to another filesystem, verify it and replace the source.
+
+    The copy is made in a staging directory next to new_path and tracked in a
+    sidecar state file. Files whose size and modification time already match
+    are skipped, so an interrupted run resumes where it stopped. Only after
+    every file is verified is the staging directory renamed to new_path,
+    data synced to disk and the source removed.
+
+    Returns:
+        dict: files_copied, bytes_copied and files_resumed of this run
     """
-    def raise_walk_error(error: OSError) -> None:
-        raise error
+    staging_path, state_path = migration_paths(new_path)
+    state = read_migration_state(state_path)
+    if state is not None and (state.get('legacy_path') != source or state.get('new_path') != new_path):
+        raise RuntimeError(
+            f"Migration state '{state_path}' belongs to a migration of '{state.get('legacy_path')}' "
+            f"to '{state.get('new_path')}'. Remove it and '{staging_path}' to start over."
+        )
+    if state is None and os.path.lexists(staging_path):
+        raise RuntimeError(
+            f"Staging directory '{staging_path}' exists without migration state. Remove it to start over."
+        )
 
-    for root, directories, files in os.walk(path, followlinks=False, onerror=raise_walk_error):
-        for name in directories + files:
-            child_path = os.path.join(root, name)
-            changed = module.set_owner_if_different(child_path, owner, changed)
-            changed = module.set_group_if_different(child_path, group, changed)
-    return changed
+    counts = {'files_copied': 0, 'bytes_copied': 0, 'files_resumed': 0}
+    state = state or {'legacy_path': source, 'new_path': new_path, 'staging_path': staging_path}
+    state.update(phase='copying', **counts)
+    write_migration_state(state_path, state)
+    last_write = time.monotonic()
+
+    def record(results: list[tuple[int, bool]]) -> None:
+        nonlocal last_write
+        for copied, resumed in results:
+            if resumed:
+                counts['files_resumed'] += 1
+            else:
+                counts['files_copied'] += 1
+                counts['bytes_copied'] += copied
+        if time.monotonic() - last_write >= STATE_WRITE_INTERVAL:
+            state.update(counts)
+            write_migration_state(state_path, state)
+            last_write = time.monotonic()
+
+    directories: list[tuple[str, str, os.stat_result]] = []
+    copied_files: list[tuple[str, str]] = []
+    queue_limit = max(1, workers) * COPY_QUEUE_DEPTH
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending: set[Future[Any]] = set()
+        stack = [(source, staging_path)]
+        try:
+            while stack:
+                source_directory, destination_directory = stack.pop()
+                source_directory_stat = os.lstat(source_directory)
+                resumed_directory = os.path.isdir(destination_directory)
+                if not resumed_directory:
+                    if os.path.lexists(destination_directory):
+                        remove_path(destination_directory)
+                    os.mkdir(destination_directory, 0o700)
+                directories.append((source_directory, destination_directory, source_directory_stat))
+
+                names: set[str] = set()
+                with os.scandir(source_directory) as entries:
+                    for entry in entries:
+                        names.add(entry.name)
+                        destination = os.path.join(destination_directory, entry.name)
+                        entry_stat = entry.stat(follow_symlinks=False)
+                        if stat.S_ISDIR(entry_stat.st_mode):
+                            stack.append((entry.path, destination))
+                        elif stat.S_ISREG(entry_stat.st_mode):
+                            copied_files.append((entry.path, destination))
+                            pending.add(executor.submit(copy_file, entry.path, destination, entry_stat))
+                        else:
+                            copy_special(module, entry.path, destination, entry_stat)
+
+                # Entries staged by an interrupted run whose source has since
+                # been deleted or renamed would otherwise be migrated with the rest.
+                if resumed_directory:
+                    with os.scandir(destination_directory) as entries:
+                        for entry in entries:
+                            if entry.name not in names:
+                                remove_path(entry.path)
+
+                pending, results = drain(pending, queue_limit)
+                record(results)
+
+            pending, results = drain(pending, 0)
+            record(results)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+        # Directory permissions and timestamps are applied last, deepest first,
+        # as creating their contents changes them.
+        for source_directory, destination_directory, source_directory_stat in reversed(directories):
+            copy_metadata(source_directory, destination_directory, source_directory_stat)
+
+        state.update(counts, phase='verifying')
+        write_migration_state(state_path, state)
+
+        mismatches: list[str] = []
+        pending = set()
+        for source_file, destination_file in copied_files:
+            pending.add(executor.submit(verify_file, source_file, destination_file, verify_checksum))
+            pending, results = drain(pending, queue_limit)
+            mismatches.extend(result for result in results if result)
+        pending, results = drain(pending, 0)
+        mismatches.extend(result for result in results if result)
+
+    if mismatches:
+        raise RuntimeError(
+            f"Verification of {len(mismatches)} copied files failed; the legacy path was kept: "
+            + "; ".join(mismatches[:10])
+        )
+
+    os.sync()
+    state.update(phase='removing_source')
+    write_migration_state(state_path, state)
+    os.rename(staging_path, new_path)
+    finish_migration(source, state_path)
+    return counts
+
+
+def finish_migration(source: str, state_path: str) -> None:
+    """
+    Remove the migrated source tree and the sidecar state file.
+    """
+    if os.path.lexists(source):
+        shutil.rmtree(source)
+    os.unlink(state_path)
+
+
+def set_recursive_ownership(path: str, uid: int, gid: int, workers: int) -> tuple[int, int]:
+    """
+    Recursively apply owner and group without following symbolic links.
+
+    Returns the number of entries scanned and changed.
+    """
+    return chown_tree(path, uid, gid, workers)
 
 
 def run_module() -> None:
@@ -177,7 +623,10 @@ def run_module() -> None:
         owner=dict(type='str', required=False, default=None),
         group=dict(type='str', required=False, default=None),
         mode=dict(type='str', required=False, default='0775'),
-        recurse=dict(type='bool', required=False, default=False)
+        recurse=dict(type='bool', required=False, default=False),
+        workers=dict(type='int', required=False, default=DEFAULT_WORKERS),
+        cross_device=dict(type='bool', required=False, default=False),
+        verify_checksum=dict(type='bool', required=False, default=False)
     )
 
     result: dict[str, object] = dict(
@@ -200,6 +649,9 @@ def run_module() -> None:
     group = module.params['group']
     mode_str = module.params['mode']
     recurse = module.params['recurse']
+    workers = module.params['workers']
+    cross_device = module.params['cross_device']
+    verify_checksum = module.params['verify_checksum']
 
     result['path'] = new_path
 
@@ -237,13 +689,34 @@ def run_module() -> None:
     ):
         module.fail_json(msg=f"New path '{new_path}' must not be inside legacy path '{legacy_path}'.")
 
+    across_filesystems = False
     if legacy_is_dir and not new_exists:
         destination_parent = get_existing_parent(os.path.dirname(new_path_normalized))
-        if os.stat(legacy_path).st_dev != os.stat(destination_parent).st_dev:
+        across_filesystems = os.stat(legacy_path).st_dev != os.stat(destination_parent).st_dev
+        if across_filesystems and not cross_device:
             module.fail_json(
-                msg=f"Cannot migrate directory '{legacy_path}' to '{new_path}' across filesystems."
+                msg=f"Cannot migrate directory '{legacy_path}' to '{new_path}' across filesystems. "
+                    "Set cross_device to copy it instead."
             )
 
+    # Resume a cross-filesystem migration interrupted after the copy was in place
+    if legacy_is_dir and new_is_dir and cross_device:
+        _, state_path = migration_paths(new_path_normalized)
+        try:
+            state = read_migration_state(state_path)
+            if (
+                state is not None
+                and state.get('phase') == 'removing_source'
+                and state.get('legacy_path') == legacy_path_normalized
+                and state.get('new_path') == new_path_normalized
+            ):
+                finish_migration(legacy_path_normalized, state_path)
+                legacy_exists = legacy_is_dir = False
+                result['moved'] = True
+                result['changed'] = True
+        except Exception as e:
+            module.fail_json(msg=f"Failed to finish migrating '{legacy_path}' to '{new_path}': {str(e)}", **result)
+
     # --- Main Logic ---
 
     # Error if both paths exist (safer default)
@@ -287,7 +760,16 @@ def run_module() -> None:
                             except OSError as e:
                                 module.warn(f"Could not set attributes on created parent directory {created_dir}: {str(e)}")
             
-            module.atomic_move(legacy_path, new_path)
+            if across_filesystems:
+                result.update(copy_across_filesystems(
+                    module,
+                    legacy_path_normalized,
+                    new_path_normalized,
+                    workers,
+                    verify_checksum
+                ))
+            else:
+                module.atomic_move(legacy_path, new_path)
             result['moved'] = True
             result['changed'] = True
         except Exception as e:
@@ -347,13 +829,10 @@ def run_module() -> None:
             changed_attributes = module.set_fs_attributes_if_different(file_args, result['changed'])
             result['changed'] = result['changed'] or changed_attributes
             if recurse and (owner is not None or group is not None):
-                result['changed'] = set_recursive_ownership(
-                    module,
-                    new_path,
-                    owner,
-                    group,
-                    bool(result['changed'])
-                )
+                entries_scanned, entries_changed = set_recursive_ownership(new_path, uid, gid, workers)
+                result['entries_scanned'] = entries_scanned
+                result['entries_changed'] = entries_changed
+                result['changed'] = result['changed'] or entries_changed > 0
         except Exception as e:
             module.fail_json(msg=f"Failed to set attributes on {new_path}: {str(e)}", **result)
 
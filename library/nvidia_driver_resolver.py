@@ -5,9 +5,12 @@
 from __future__ import annotations
 
 import glob
+import hashlib
 import json
 import os
 import re
+import tempfile
+from collections.abc import Callable
 from typing import Any
 
 
@@ -25,11 +28,23 @@ options:
       - Path to the NVIDIA Driver Assistant supported GPU catalog.
     type: path
     required: true
+  catalog_index_path:
+    description:
+      - Optional path caching the catalog's chips indexed by PCI ID.
+      - The index is rebuilt when the catalog's SHA-256 no longer matches.
+    type: path
+    required: false
   releases_path:
     description:
       - Path to NVIDIA's driver release metadata.
     type: path
     required: true
+  releases_index_path:
+    description:
+      - Optional path caching each release branch's type and x86_64 versions.
+      - The index is rebuilt when the metadata's SHA-256 no longer matches.
+    type: path
+    required: false
   patch_path:
     description:
       - Path to the pinned Keylase patch script used to identify supported releases.
@@ -85,7 +100,9 @@ EXAMPLES = r"""
 - name: Resolve NVIDIA driver
   nvidia_driver_resolver:
     catalog_path: /usr/share/nvidia-driver-assistant/supported-gpus/supported-gpus.json
+    catalog_index_path: /var/cache/saltbox/nvidia/supported-gpus.index.json
     releases_path: /var/cache/saltbox/nvidia/releases.json
+    releases_index_path: /var/cache/saltbox/nvidia/releases.index.json
     patch_path: /var/cache/saltbox/nvidia/patch.sh
     driver_version: latest
   register: nvidia_driver_resolution
@@ -148,12 +165,120 @@ def _normalise_pci_id(value: str) -> str:
     return "0x%s" % value.lower().removeprefix("0x").zfill(4).upper()
 
 
-def inventory_devices(sysfs_path: str, catalog: dict[str, Any]) -> list[dict[str, Any]]:
-    """Match NVIDIA display-class sysfs devices against NVIDIA's catalog."""
+INDEX_FORMAT = 2
+
+
+def _chip_summary(chip: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "name": chip.get("name", "unknown"),
+        "features": chip.get("features", []),
+        "legacybranch": chip.get("legacybranch"),
+    }
+
+
+def build_catalog_index(catalog: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """Index NVIDIA's catalog by device ID and by device and subsystem IDs.
+
+    Only the first chip of each key is kept, matching the catalog order used
+    when several chips share an ID.
+    """
     chips = catalog.get("chips")
     if not isinstance(chips, list):
         raise ValueError("NVIDIA GPU catalog does not contain a chips list")
 
+    generic: dict[str, Any] = {}
+    exact: dict[str, Any] = {}
+    for chip in chips:
+        if not isinstance(chip, dict) or not chip.get("devid"):
+            continue
+        device_id = _normalise_pci_id(str(chip["devid"]))
+        if chip.get("subvendorid") and chip.get("subdevid"):
+            key = "%s/%s/%s" % (
+                device_id,
+                _normalise_pci_id(str(chip["subvendorid"])),
+                _normalise_pci_id(str(chip["subdevid"])),
+            )
+            exact.setdefault(key, _chip_summary(chip))
+        elif "subvendorid" not in chip and "subdevid" not in chip:
+            generic.setdefault(device_id, _chip_summary(chip))
+    return {"generic": generic, "exact": exact}
+
+
+def build_releases_index(releases: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """Reduce NVIDIA's release metadata to each branch's type and x86_64 versions."""
+    if not isinstance(releases, dict):
+        raise ValueError("NVIDIA release metadata is not an object")
+
+    index: dict[str, dict[str, Any]] = {}
+    for branch, data in releases.items():
+        if not isinstance(data, dict):
+            continue
+        versions = [
+            release.get("release_version")
+            for release in data.get("driver_info", [])
+            if release.get("release_version")
+            and "x86_64" in release.get("architectures", [])
+        ]
+        index[str(branch)] = {
+            "type": str(data.get("type", "")),
+            "versions": list(dict.fromkeys(versions)),
+        }
+    return index
+
+
+def _write_index(index_path: str, data: dict[str, Any]) -> None:
+    directory = os.path.dirname(index_path) or "."
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".%s." % os.path.basename(index_path))
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as stream:
+            json.dump(data, stream, separators=(",", ":"))
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, index_path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+
+def load_index(
+    source_path: str,
+    index_path: str | None,
+    build: Callable[[Any], dict[str, Any]],
+) -> dict[str, Any]:
+    """Return the index of a JSON document, reusing a cached index of the same document.
+
+    The cache is keyed by the document's SHA-256, so hashing it is all a
+    cached run costs. A missing, stale or unreadable cache only means the
+    document is parsed again.
+    """
+    with open(source_path, "rb") as stream:
+        content = stream.read()
+    digest = hashlib.sha256(content).hexdigest()
+
+    if index_path:
+        try:
+            with open(index_path, "r", encoding="utf-8") as stream:
+                cached = json.load(stream)
+            if (
+                isinstance(cached, dict)
+                and cached.get("format") == INDEX_FORMAT
+                and cached.get("sha256") == digest
+                and isinstance(cached.get("index"), dict)
+            ):
+                return cached["index"]
+        except (OSError, ValueError):
+            pass
+
+    index = build(json.loads(content))
+    if index_path:
+        _write_index(index_path, {"format": INDEX_FORMAT, "sha256": digest, "index": index})
+    return index
+
+
+def inventory_devices(sysfs_path: str, catalog_index: dict[str, dict[str, Any]]) -> list[dict[str, Any]]:
+    """Match NVIDIA display-class sysfs devices against NVIDIA's catalog index."""
     devices: list[dict[str, Any]] = []
     for device_path in sorted(glob.glob(os.path.join(sysfs_path, "bus", "pci", "devices", "*"))):
         try:
@@ -167,22 +292,9 @@ def inventory_devices(sysfs_path: str, catalog: dict[str, Any]) -> list[dict[str
         device_id = _normalise_pci_id(_read_text(os.path.join(device_path, "device")))
         subvendor_id = _normalise_pci_id(_read_text(os.path.join(device_path, "subsystem_vendor")))
         subdevice_id = _normalise_pci_id(_read_text(os.path.join(device_path, "subsystem_device")))
-        matching = [
-            chip
-            for chip in chips
-            if chip.get("devid") and _normalise_pci_id(str(chip["devid"])) == device_id
-        ]
-        exact = [
-            chip
-            for chip in matching
-            if chip.get("subvendorid")
-            and chip.get("subdevid")
-            and _normalise_pci_id(str(chip["subvendorid"])) == subvendor_id
-            and _normalise_pci_id(str(chip["subdevid"])) == subdevice_id
-        ]
-        generic = [chip for chip in matching if "subvendorid" not in chip and "subdevid" not in chip]
-        selected = exact or generic
-        if not selected:
+        exact = catalog_index["exact"].get("%s/%s/%s" % (device_id, subvendor_id, subdevice_id))
+        chip = exact or catalog_index["generic"].get(device_id)
+        if not chip:
             devices.append(
                 {
                     "address": os.path.basename(device_path),
@@ -197,16 +309,15 @@ def inventory_devices(sysfs_path: str, catalog: dict[str, Any]) -> list[dict[str
             )
             continue
 
-        chip = selected[0]
         devices.append(
             {
                 "address": os.path.basename(device_path),
                 "devid": device_id,
                 "subvendorid": subvendor_id,
                 "subdevid": subdevice_id,
-                "name": chip.get("name", "unknown"),
-                "features": chip.get("features", []),
-                "legacybranch": chip.get("legacybranch"),
+                "name": chip["name"],
+                "features": chip["features"],
+                "legacybranch": chip["legacybranch"],
                 "subsystem_specific": bool(exact),
                 "unknown": False,
             }
@@ -277,14 +388,7 @@ def _module_flavor(devices: list[dict[str, Any]], requested: str) -> str:
 
 
 def _release_versions(releases: dict[str, Any], branch: str) -> list[str]:
-    branch_data = releases.get(branch, {})
-    versions = [
-        release.get("release_version")
-        for release in branch_data.get("driver_info", [])
-        if release.get("release_version")
-        and "x86_64" in release.get("architectures", [])
-    ]
-    return sorted(set(versions), key=version_key, reverse=True)
+    return sorted(releases.get(branch, {}).get("versions", []), key=version_key, reverse=True)
 
 
 def _automatic_branch(
@@ -329,7 +433,10 @@ def resolve_driver(
     patch_enabled: bool = True,
     minimum_legacy_branch: int = 580,
 ) -> dict[str, Any]:
-    """Resolve the exact driver and policy for already-inventoried devices."""
+    """Resolve the exact driver and policy for already-inventoried devices.
+
+    releases is the branch index returned by build_releases_index.
+    """
     if not devices:
         raise ValueError("no NVIDIA display-class GPU was detected")
     unknown = [device for device in devices if device.get("unknown")]
@@ -440,7 +547,9 @@ def main() -> None:
     module = AnsibleModule(
         argument_spec={
             "catalog_path": {"type": "path", "required": True},
+            "catalog_index_path": {"type": "path", "required": False},
             "releases_path": {"type": "path", "required": True},
+            "releases_index_path": {"type": "path", "required": False},
             "patch_path": {"type": "path", "required": False},
             "driver_version": {"type": "str", "required": True},
             "driver_branch": {"type": "str", "default": "auto"},
@@ -458,12 +567,10 @@ def main() -> None:
         supports_check_mode=True,
     )
     try:
-        with open(module.params["catalog_path"], "r", encoding="utf-8") as stream:
-            catalog = json.load(stream)
-        with open(module.params["releases_path"], "r", encoding="utf-8") as stream:
-            releases = json.load(stream)
+        catalog_index = load_index(module.params["catalog_path"], module.params["catalog_index_path"], build_catalog_index)
+        releases = load_index(module.params["releases_path"], module.params["releases_index_path"], build_releases_index)
         patch_content = _read_text(module.params["patch_path"]) if module.params["patch_path"] else ""
-        devices = inventory_devices(module.params["sysfs_path"], catalog)
+        devices = inventory_devices(module.params["sysfs_path"], catalog_index)
         result = resolve_driver(
             devices=devices,
             releases=releases,
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+DOCUMENTATION = """
+---
+module: recursive_ownership
+description:
+    - Recursively sets the owner and group of one or more directory trees, like C(chown -R).
+    - Only entries whose owner or group differ are changed, so runs on trees that are already correct do not write any metadata.
+    - All trees are walked in parallel by a shared thread pool.
+    - Symbolic links are changed themselves and never followed.
+author: salty
+options:
+    paths:
+        description: Paths to change, including everything below them.
+        required: true
+        type: list
+        elements: str
+    owner:
+        description: Name of the user that should own the entries.
+        required: false
+        type: str
+    group:
+        description: Name of the group that should own the entries.
+        required: false
+        type: str
+    exclude:
+        description:
+            - Absolute paths that are skipped together with everything below them.
+        required: false
+        type: list
+        elements: str
+        default: []
+    workers:
+        description: Number of threads walking directories in parallel.
+        required: false
+        type: int
+        default: 8
+"""
+
+EXAMPLES = """
+- name: Set ownership of the appdata and home folders
+  recursive_ownership:
+    paths:
+      - /opt
+      - /home/seed
+    owner: seed
+    group: seed
+    exclude:
+      - /opt/plex/Library/Application Support/Plex Media Server/Cache
+"""
+
+RETURN = """
+entries_scanned:
+    description: Number of entries checked, including the paths themselves.
+    type: int
+    returned: always
+    sample: 1520311
+entries_changed:
+    description: Number of entries whose ownership was changed.
+    type: int
+    returned: always
+    sample: 42
+"""
+
+import grp
+import os
+import pwd
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.saltbox_ownership import DEFAULT_WORKERS, chown_path, chown_trees
+
+
+def get_id_info(module: AnsibleModule, owner: str | None = None, group: str | None = None) -> tuple[int, int]:
+    uid = -1
+    gid = -1
+    if owner is not None:
+        try:
+            uid = pwd.getpwnam(owner).pw_uid
+        except KeyError:
+            module.fail_json(msg=f"User '{owner}' not found on the system.")
+    if group is not None:
+        try:
+            gid = grp.getgrnam(group).gr_gid
+        except KeyError:
+            module.fail_json(msg=f"Group '{group}' not found on the system.")
+    return uid, gid
+
+
+def normalize_paths(module: AnsibleModule, paths: list[str], option: str) -> list[str]:
+    """
+    Return absolute, normalized paths so they compare equal to walked entries.
+    """
+    normalized: list[str] = []
+    for path in paths:
+        if not os.path.isabs(path):
+            module.fail_json(msg=f"Path '{path}' in '{option}' must be absolute.")
+        normalized.append(os.path.normpath(path))
+    return normalized
+
+
+def run_module() -> None:
+    module_args = dict(
+        paths=dict(type='list', elements='str', required=True),
+        owner=dict(type='str', required=False),
+        group=dict(type='str', required=False),
+        exclude=dict(type='list', elements='str', required=False, default=[]),
+        workers=dict(type='int', required=False, default=DEFAULT_WORKERS)
+    )
+
+    result: dict[str, object] = dict(
+        changed=False,
+        entries_scanned=0,
+        entries_changed=0,
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        required_one_of=[('owner', 'group')]
+    )
+
+    uid, gid = get_id_info(module, module.params['owner'], module.params['group'])
+    paths = normalize_paths(module, module.params['paths'], 'paths')
+    exclude = frozenset(normalize_paths(module, module.params['exclude'], 'exclude'))
+    roots = [path for path in dict.fromkeys(paths) if path not in exclude]
+
+    for path in roots:
+        if not os.path.lexists(path):
+            module.fail_json(msg=f"Path '{path}' does not exist.", **result)
+
+    scanned = 0
+    changed = 0
+    try:
+        for path in roots:
+            scanned += 1
+            if chown_path(path, uid, gid):
+                changed += 1
+
+        directories = [path for path in roots if os.path.isdir(path) and not os.path.islink(path)]
+        tree_scanned, tree_changed = chown_trees(directories, uid, gid, module.params['workers'], exclude)
+        scanned += tree_scanned
+        changed += tree_changed
+    except OSError as e:
+        module.fail_json(msg=f"Failed to set ownership: {str(e)}")
+
+    result.update(entries_scanned=scanned, entries_changed=changed, changed=changed > 0)
+    module.exit_json(**result)
+
+
+def main() -> None:
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
@@ -18,8 +18,17 @@ options:
     instance:
         description:
             - Instance name for the role.
-        required: true
+            - Exactly one of C(instance) or C(instances) is required.
+        required: false
         type: str
+    instances:
+        description:
+            - Several instances of the role to process in one invocation.
+            - Either a list of instance names sharing C(keys), or a dictionary mapping
+              instance names to their own keys, which are merged over C(keys).
+            - The role file is parsed once and written at most once for all instances.
+        required: false
+        type: raw
     method:
         description:
             - Operation to perform.
@@ -135,6 +144,25 @@ EXAMPLES = """
     base_path: "{{ server_appdata_path }}"
   register: register_var
 
+- name: Load tokens for several instances at once
+  saltbox_facts:
+    role: plex
+    instances: "{{ plex_instances }}"
+    keys:
+      token: ""
+    base_path: "{{ server_appdata_path }}"
+  register: register_var
+
+- name: Save instance specific keys in one write
+  saltbox_facts:
+    role: myapp
+    instances:
+      instance1:
+        key1: value1
+      instance2:
+        key1: value2
+    base_path: "{{ server_appdata_path }}"
+
 - name: Save facts with custom permissions
   saltbox_facts:
     role: myapp
@@ -148,7 +176,9 @@ EXAMPLES = """
 
 RETURN = """
 facts:
-    description: Dictionary containing the loaded or saved facts
+    description:
+        - Dictionary containing the loaded or saved facts
+        - When C(instances) is used, a dictionary of facts keyed by instance name
     type: dict
     returned: When method is 'save' or when keys are processed
 changed:
@@ -162,135 +192,141 @@ message:
 """
 
 import configparser
-import grp
+import fcntl
 import os
-import pwd
 import stat
 import tempfile
-from io import StringIO
-from typing import Any
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.saltbox_facts_store import (
+    current_signature,
+    file_signature,
+    get_current_identity,
+    get_file_path,
+    merge_facts,
+    normalize_instances,
+    parse_mode,
+    read_config_state,
+    render_config,
+    resolve_ownership,
+    validate_instance_name,
+    validate_keys,
+)
+
+# Attempts at a read-modify-write before giving up on a file that keeps being
+# replaced by writers that do not take the directory lock.
+UPDATE_ATTEMPTS = 5
+
+
+def fsync_directory(directory: str) -> None:
+    """
+    Flush a directory entry change, such as a rename or unlink, to disk.
+    """
+    directory_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(directory_fd)
+    finally:
+        os.close(directory_fd)
 
 
-def create_config_parser() -> configparser.ConfigParser:
-    """
-    Create a consistently configured, case-sensitive INI parser.
-    """
-    config = configparser.ConfigParser(
-        interpolation=None,
-        comment_prefixes=('#',),
-        inline_comment_prefixes=None,
-        default_section='DEFAULT',
-        delimiters=('=',),
-        empty_lines_in_values=False
-    )
-    config.optionxform = str
-    return config
-
-
-def read_config(file_path: str) -> configparser.ConfigParser:
-    """
-    Read an INI file while surfacing filesystem and parsing errors.
-    """
-    config = create_config_parser()
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as config_file:
-                config.read_file(config_file)
-        except configparser.Error as error:
-            raise ValueError(f"Configuration parsing error in '{file_path}': {error}") from error
-        except OSError as error:
-            raise OSError(f"Unable to read configuration file '{file_path}': {error}") from error
-    return config
-
-
-def validate_instance_name(instance: Any) -> None:
-    """
-    Validate that the instance name is a string.
-
-    Args:
-        instance: Value to validate as instance name
-
-    Raises:
-        ValueError: If instance is not a string
+@contextmanager
+def directory_lock(directory: str) -> Iterator[bool]:
     """
-    if not isinstance(instance, str):
-        raise ValueError("Instance name must be a string")
-    if not instance.strip():
-        raise ValueError("Instance name must be non-empty")
-    if instance == configparser.DEFAULTSECT:
-        raise ValueError(f"Instance name must not be '{configparser.DEFAULTSECT}'")
-    if any(character in instance for character in ('\r', '\n', '[', ']')):
-        raise ValueError("Instance name must not contain line breaks or square brackets")
+    Hold an exclusive advisory lock on the facts directory.
 
+    Role files are replaced atomically, so their inode changes on every write
+    and cannot carry the lock themselves. Locking the directory serializes
+    concurrent plays updating files in it.
 
-def validate_key_name(key: Any) -> None:
+    Yields:
+        bool: False if the directory does not exist and nothing was locked
     """
-    Validate that a key can be represented without changing its INI identity.
-    """
-    if not isinstance(key, str):
-        raise ValueError(f"Invalid key '{key}': must be a string")
-    if not key.strip():
-        raise ValueError("Configuration keys must be non-empty")
-    if any(character in key for character in ('\r', '\n', '=')):
-        raise ValueError(f"Invalid key '{key}': must not contain line breaks or '='")
-    if key.lstrip().startswith('#'):
-        raise ValueError(f"Invalid key '{key}': must not be interpreted as a comment")
-
+    try:
+        directory_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except FileNotFoundError:
+        yield False
+        return
 
-def validate_keys(keys: Any, validate_values: bool = True) -> None:
-    """
-    Validate configuration keys and values.
+    try:
+        fcntl.flock(directory_fd, fcntl.LOCK_EX)
+        yield True
+    finally:
+        os.close(directory_fd)
 
-    Args:
-        keys (dict): Dictionary of configuration keys and values to validate
 
-    Raises:
-        ValueError: If keys is not a dictionary or if any key/value is invalid
+def update_config(
+    file_path: str,
+    update: Callable[[configparser.ConfigParser], bool],
+    mode: int | None = None,
+    uid: int | None = None,
+    gid: int | None = None
+) -> bool:
     """
-    if not isinstance(keys, dict):
-        raise ValueError("Keys must be a dictionary")
-
-    for key, value in keys.items():
-        validate_key_name(key)
-        if validate_values and not isinstance(value, (str, int, float, bool)):
-            raise ValueError(
-                f"Invalid value type for key '{key}': must be string, number, or boolean"
-            )
+    Apply an update to an INI file with a single parse and at most one write.
 
-
-def get_file_path(role: str, base_path: str) -> str:
-    """
-    Get the configuration file path for a role.
+    The file is read and rewritten while holding the directory lock. Before
+    the rewrite, the file is checked against the device, inode, modification
+    time and size it had when it was read; if another writer replaced it in
+    the meantime, the update is applied again to the new contents. Nothing is
+    written when the rendered file is byte-identical to the existing one.
 
     Args:
-        role (str): Name of the role
-        base_path (str): Base directory path
+        file_path (str): Path to the configuration file
+        update (callable): Modifies the parsed configuration in place and
+                           returns whether anything changed. It may be called
+                           again on a fresh parse and must not keep state
+                           between calls.
+        mode (int): File permissions mode; defaults to that of the existing file
+        uid (int): Numerical ID of the file owner; defaults to the existing owner
+        gid (int): Numerical ID of the file group; defaults to the existing group
 
     Returns:
-        str: Full path to the configuration file
+        bool: True if the file was written
 
     Raises:
-        ValueError: If role is not a string
+        RuntimeError: If the file kept changing during every attempt
     """
-    if not isinstance(role, str):
-        raise ValueError("Role name must be a string")
-    if os.path.sep in role or (os.path.altsep and os.path.altsep in role):
-        raise ValueError("Role name must not contain path separators")
-    if role in ('.', '..') or role.strip() == '':
-        raise ValueError("Role name must be a non-empty name")
-    if not isinstance(base_path, str) or not base_path.strip():
-        raise ValueError("Base path must be a non-empty string")
-    if not os.path.isabs(base_path):
-        raise ValueError("Base path must be absolute")
-    return os.path.join(os.path.normpath(base_path), 'saltbox', f'{role}.ini')
+    directory = os.path.dirname(file_path)
+
+    for _ in range(UPDATE_ATTEMPTS):
+        with directory_lock(directory) as locked:
+            config, content, file_stat = read_config_state(file_path)
+            if not update(config):
+                return False
+
+            rendered = render_config(config)
+            if rendered == content:
+                return False
+
+            if not locked:
+                # First write to a new directory; create it and update under the lock.
+                os.makedirs(directory, exist_ok=True)
+                continue
+            if current_signature(file_path) != file_signature(file_stat):
+                continue
+
+            if file_stat is not None:
+                mode = stat.S_IMODE(file_stat.st_mode) if mode is None else mode
+                uid = file_stat.st_uid if uid is None else uid
+                gid = file_stat.st_gid if gid is None else gid
+            if mode is None or uid is None or gid is None:
+                raise ValueError(f"File attributes are required to create '{file_path}'")
+
+            atomic_write(file_path, rendered, mode, uid, gid)
+            return True
+
+    raise RuntimeError(f"Configuration file '{file_path}' kept changing while it was being updated")
 
 
 def atomic_write(file_path: str, content: str, mode: int, uid: int, gid: int) -> None:
     """
     Write content to file atomically with proper permissions.
 
+    Both the file and its directory are synced, so the replacement survives a
+    crash once this returns.
+
     Args:
         file_path (str): Path to the target file
         content (str): Content to write to the file
@@ -321,6 +357,8 @@ def atomic_write(file_path: str, content: str, mode: int, uid: int, gid: int) ->
             os.unlink(temp_path)
         raise
 
+    fsync_directory(directory)
+
 
 def ensure_file_attributes(file_path: str, mode: int, uid: int, gid: int) -> bool:
     """
@@ -341,28 +379,45 @@ def ensure_file_attributes(file_path: str, mode: int, uid: int, gid: int) -> boo
     return changed
 
 
-def load_existing_facts(file_path: str, instance: str) -> dict[str, str]:
+def process_instances(
+    file_path: str,
+    instance_keys: dict[str, dict[str, Any]],
+    uid: int,
+    gid: int,
+    mode: int,
+    overwrite: bool = False
+) -> tuple[dict[str, dict[str, str]], bool]:
     """
-    Load existing facts from configuration file for a specific instance.
+    Load and save facts for several instances with one parse and at most one write.
 
     Args:
         file_path (str): Path to the configuration file
-        instance (str): Name of the instance
+        instance_keys (dict): Keys to process keyed by instance name
+        uid (int): Numerical ID of the file owner
+        gid (int): Numerical ID of the file group
+        mode (int): File permissions mode in octal
+        overwrite (bool): If True, overwrite existing values; if False, keep existing values
 
     Returns:
-        dict: Dictionary of existing facts for the instance
+        tuple: (dict of final facts keyed by instance, bool indicating if changes were made)
 
     """
-    validate_instance_name(instance)
-    config = read_config(file_path)
-    existing_facts: dict[str, str] = {}
+    for instance, keys in instance_keys.items():
+        validate_instance_name(instance)
+        validate_keys(keys)
 
-    if config.has_section(instance):
-        for key, value in config._sections[instance].items():
-            if value != 'None':
-                existing_facts[key] = value
+    all_facts: dict[str, dict[str, str]] = {}
 
-    return existing_facts
+    def update(config: configparser.ConfigParser) -> bool:
+        changed = False
+        all_facts.clear()
+        for instance, keys in instance_keys.items():
+            all_facts[instance], instance_changed = merge_facts(config, instance, keys, overwrite)
+            changed = changed or instance_changed
+        return changed
+
+    changed = update_config(file_path, update, mode, uid, gid)
+    return all_facts, changed
 
 
 def process_facts(
@@ -391,156 +446,53 @@ def process_facts(
 
     """
     validate_instance_name(instance)
-    validate_keys(keys)
-
-    existing_facts = load_existing_facts(file_path, instance)
-    final_facts: dict[str, str] = {}
-    keys_to_save: dict[str, str] = {}
-
-    if overwrite:
-        final_facts.update(existing_facts)
-        final_facts.update({key: str(value) for key, value in keys.items()})
-        keys_to_save = {key: str(value) for key, value in keys.items()}
-    else:
-        final_facts.update({key: str(value) for key, value in keys.items()})
-        final_facts.update(existing_facts)
-        for key, value in keys.items():
-            if key not in existing_facts:
-                keys_to_save[key] = str(value)
-
-    if not keys_to_save:
-        return final_facts, False
-
-    config = read_config(file_path)
-    changed = False
+    all_facts, changed = process_instances(file_path, {instance: keys}, uid, gid, mode, overwrite)
+    return all_facts[instance], changed
 
-    if not config.has_section(instance):
-        config.add_section(instance)
-        changed = True
 
-    for key, value in keys_to_save.items():
-        section_values = config._sections[instance]
-        if key not in section_values or section_values[key] != value:
-            config.set(instance, key, value)
-            changed = True
-
-    if changed:
-        with StringIO() as string_buffer:
-            config.write(string_buffer)
-            config_str = string_buffer.getvalue()
-
-        atomic_write(file_path, config_str, mode, uid, gid)
-
-    return final_facts, changed
-
-
-def delete_facts(file_path: str, delete_type: str, instance: str, keys: dict[str, Any]) -> bool:
+def delete_facts(file_path: str, delete_type: str, instance_keys: dict[str, dict[str, Any]]) -> bool:
     """
     Delete facts from configuration file.
 
     Args:
         file_path (str): Path to the configuration file
         delete_type (str): Type of deletion ('role', 'instance', or 'key')
-        instance (str): Name of the instance
-        keys (dict): Dictionary of keys to delete (used only for delete_type='key')
+        instance_keys (dict): Keys to delete keyed by instance name
+                              (keys are used only for delete_type='key')
 
     Returns:
         bool: True if changes were made, False otherwise
 
     """
-    validate_instance_name(instance)
-    validate_keys(keys, validate_values=False)
+    for instance, keys in instance_keys.items():
+        validate_instance_name(instance)
+        validate_keys(keys, validate_values=False)
 
     if delete_type == 'role':
-        if os.path.lexists(file_path):
-            os.remove(file_path)
-            return True
+        directory = os.path.dirname(file_path)
+        with directory_lock(directory):
+            if os.path.lexists(file_path):
+                os.remove(file_path)
+                fsync_directory(directory)
+                return True
         return False
 
     if not os.path.exists(file_path):
         return False
 
-    config = read_config(file_path)
-    changed = False
+    def update(config: configparser.ConfigParser) -> bool:
+        changed = False
+        for instance, keys in instance_keys.items():
+            if delete_type == 'instance':
+                changed = config.remove_section(instance) or changed
+            elif delete_type == 'key' and config.has_section(instance):
+                section_values = config._sections[instance]
+                for key in keys:
+                    if key in section_values:
+                        changed = config.remove_option(instance, key) or changed
+        return changed
 
-    if delete_type == 'instance':
-        changed = config.remove_section(instance)
-    elif delete_type == 'key' and config.has_section(instance):
-        section_values = config._sections[instance]
-        for key in keys:
-            if key in section_values:
-                changed = config.remove_option(instance, key) or changed
-
-    if changed:
-        with StringIO() as string_buffer:
-            config.write(string_buffer)
-            config_str = string_buffer.getvalue()
-
-        file_stat = os.stat(file_path)
-        atomic_write(
-            file_path,
-            config_str,
-            stat.S_IMODE(file_stat.st_mode),
-            file_stat.st_uid,
-            file_stat.st_gid
-        )
-
-    return changed
-
-
-def parse_mode(mode: Any) -> int:
-    """
-    Parse and validate file mode.
-
-    Args:
-        mode (str): File mode in octal string format (e.g., '0640')
-
-    Returns:
-        int: Parsed mode as integer
-
-    Raises:
-        ValueError: If mode is invalid or improperly formatted
-    """
-    if not isinstance(mode, str):
-        raise ValueError("Mode must be a quoted string to comply with YAML best practices.")
-    mode = mode.strip()
-    if mode.startswith('0'):
-        try:
-            parsed_mode = int(mode, 8)
-        except ValueError:
-            raise ValueError(f"Invalid octal mode: {mode}")
-        if parsed_mode > 0o7777:
-            raise ValueError("Mode must not exceed '07777'.")
-        return parsed_mode
-    else:
-        raise ValueError("Mode must be a quoted octal number starting with '0' (e.g., '0640').")
-
-
-def get_current_identity() -> tuple[str, str]:
-    """
-    Get the current user and that user's primary group.
-
-    Returns:
-        tuple: Current user name and primary group name
-    """
-    current_user = pwd.getpwuid(os.geteuid())
-    current_group = grp.getgrgid(current_user.pw_gid)
-    return current_user.pw_name, current_group.gr_name
-
-
-def resolve_ownership(owner: str, group: str) -> tuple[int, int]:
-    """
-    Resolve owner and group names before making filesystem changes.
-    """
-    try:
-        uid = pwd.getpwnam(owner).pw_uid
-    except KeyError as error:
-        raise ValueError(f"User '{owner}' not found on the system") from error
-    try:
-        gid = grp.getgrnam(group).gr_gid
-    except KeyError as error:
-        raise ValueError(f"Group '{group}' not found on the system") from error
-    return uid, gid
+    return update_config(file_path, update)
 
 
 def run_module() -> None:
@@ -553,7 +505,8 @@ def run_module() -> None:
 
     The function processes the following parameters:
     - role (str): The role name (required)
-    - instance (str): The instance name (required)
+    - instance (str): The instance name (required unless instances is given)
+    - instances (list or dict): Several instance names, or names mapped to their own keys
     - method (str): Operation to perform ('delete') - save/load is now default behavior
     - keys (dict): Configuration keys and values (default: {})
     - delete_type (str): Type of deletion ('role', 'instance', 'key')
@@ -565,7 +518,8 @@ def run_module() -> None:
     """
     module_args = dict(
         role=dict(type='str', required=True),
-        instance=dict(type='str', required=True),
+        instance=dict(type='str', required=False),
+        instances=dict(type='raw', required=False),
         method=dict(type='str', choices=['delete'], required=False),
         keys=dict(type='dict', required=False, default={}),
         delete_type=dict(type='str', choices=['role', 'instance', 'key'], required=False),
@@ -583,12 +537,15 @@ def run_module() -> None:
     )
 
     module = AnsibleModule(
-        argument_spec=module_args
+        argument_spec=module_args,
+        mutually_exclusive=[('instance', 'instances')],
+        required_one_of=[('instance', 'instances')]
     )
 
     try:
         role: str = module.params['role']
-        instance: str = module.params['instance']
+        instance: str | None = module.params.get('instance')
+        instances: Any = module.params.get('instances')
         method: str | None = module.params.get('method')
         keys: dict[str, Any] = module.params['keys']
         delete_type: str | None = module.params.get('delete_type')
@@ -602,15 +559,22 @@ def run_module() -> None:
         mode = parse_mode(module.params['mode'])
         file_path = get_file_path(role, base_path)
 
+        if instances is None:
+            validate_instance_name(instance)
+            instance_keys = {instance: keys}
+        else:
+            instance_keys = normalize_instances(instances, keys)
+
         if method == 'delete':
             if not delete_type:
                 module.fail_json(msg="delete_type is required for delete method.")
-            result['changed'] = delete_facts(file_path, delete_type, instance, keys)
+            result['changed'] = delete_facts(file_path, delete_type, instance_keys)
         else:
             uid, gid = resolve_ownership(owner, group)
-            result['facts'], content_changed = process_facts(
-                file_path, instance, keys, uid, gid, mode, overwrite
+            all_facts, content_changed = process_instances(
+                file_path, instance_keys, uid, gid, mode, overwrite
             )
+            result['facts'] = all_facts if instances is not None else all_facts[instance]
             attribute_changed = (
                 ensure_file_attributes(file_path, mode, uid, gid)
                 if os.path.exists(file_path)
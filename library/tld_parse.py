@@ -8,7 +8,9 @@ module: tld_parse
 description:
     - Parses a domain name into components needed for DNS record management
     - Extracts the full domain and subdomain portions
-    - Uses the tld Python library for parsing
+    - Uses the public suffix list bundled with the tld Python library, whose parsed form is cached on disk between runs
+    - Several domains can be parsed in one call with C(urls)
+    - The C(tld_parse) filter does the same on the controller without running a module
 author: salty
 requirements:
     - tld==0.13.2
@@ -16,11 +18,20 @@ options:
     url:
         description:
             - The domain or URL to parse
-        required: true
+            - Mutually exclusive with C(urls)
+        required: false
         type: str
+    urls:
+        description:
+            - Domains or URLs to parse in one call, returned in order as C(results)
+            - Mutually exclusive with C(url)
+        required: false
+        type: list
+        elements: str
     record:
         description:
             - Optional DNS record to prepend to the URL hostname
+            - Applies to every entry of C(urls)
         required: false
         type: str
         default: ''
@@ -38,6 +49,13 @@ EXAMPLES = """
     record: "subdomain"
   register: domain_info
 
+- name: Parse several domains
+  tld_parse:
+    urls:
+      - "{{ user.domain }}"
+      - "https://sub.example.co.uk"
+  register: domains_info
+
 - name: Use parsed values
   ansible.builtin.debug:
     msg: "Domain: {{ domain_info.domain }}, Record: {{ domain_info.record }}"
@@ -47,110 +65,75 @@ RETURN = """
 fld:
     description: Full domain name (e.g., example.com)
     type: str
-    returned: always
+    returned: when url is given
     sample: "example.com"
 subdomain:
     description: Subdomain portion (empty string if none)
     type: str
-    returned: always
+    returned: when url is given
     sample: "www"
 record:
     description: DNS record format (subdomain or '@' for root domain)
     type: str
-    returned: always
+    returned: when url is given
     sample: "www"
 tld:
     description: Top-level domain (e.g., com, org, co.uk)
     type: str
-    returned: always
+    returned: when url is given
     sample: "com"
 domain:
     description: Domain name without TLD (e.g., example)
     type: str
-    returned: always
+    returned: when url is given
     sample: "example"
+results:
+    description: Parsed components of each entry of C(urls), with the entry itself as C(url)
+    type: list
+    elements: dict
+    returned: when urls is given
+    sample: [{"url": "www.example.com", "fld": "example.com", "subdomain": "www", "record": "www", "tld": "com", "domain": "example"}]
 """
 
-from typing import TYPE_CHECKING
-from urllib.parse import urlsplit
-
 from ansible.module_utils.basic import AnsibleModule
-
-if TYPE_CHECKING:
-    from tld.utils import Result
-
-
-def build_parse_url(url: str, record: str, module: AnsibleModule) -> str:
-    """
-    Build a URL containing the hostname that should be parsed.
-
-    The input may be a bare domain or a URL. Schemes, ports, paths, queries,
-    and fragments are discarded because only the hostname is relevant.
-    """
-    normalized_url = url.strip()
-    if not normalized_url:
-        module.fail_json(msg="url must not be empty")
-
-    parsed_url = urlsplit(normalized_url if '://' in normalized_url else f"//{normalized_url}")
-    hostname = parsed_url.hostname
-    if not hostname:
-        module.fail_json(msg=f"Could not extract a hostname from '{url}'")
-
-    if hostname.endswith('.'):
-        hostname = hostname[:-1]
-    if not hostname:
-        module.fail_json(msg=f"Could not extract a hostname from '{url}'")
-
-    normalized_record = record.strip()
-    if normalized_record.endswith('.'):
-        normalized_record = normalized_record[:-1]
-    if normalized_record:
-        hostname = f"{normalized_record}.{hostname}"
-
-    return f"http://{hostname}"
+from ansible.module_utils.saltbox_tld import load_trie, parse_url
 
 
 def main() -> None:
     module = AnsibleModule(
         argument_spec=dict(
-            url=dict(type='str', required=True),
+            url=dict(type='str', required=False),
+            urls=dict(type='list', elements='str', required=False),
             record=dict(type='str', default='')
         ),
+        mutually_exclusive=[('url', 'urls')],
+        required_one_of=[('url', 'urls')],
         supports_check_mode=True
     )
 
-    url: str = module.params['url']
+    url: str | None = module.params['url']
+    urls: list[str] | None = module.params['urls']
     record: str = module.params['record']
 
     try:
+        load_trie()
+    except ImportError:
+        module.fail_json(msg="The 'tld' Python library is required. Install it with: pip install tld")
+
+    if url is not None:
+        try:
+            module.exit_json(changed=False, **parse_url(url, record))
+        except Exception as e:
+            module.fail_json(msg=f"Failed to parse domain: {e!s}")
+
+    results: list[dict[str, str]] = []
+    for entry in urls or []:
         try:
-            from tld import get_tld
-        except ImportError:
-            module.fail_json(msg="The 'tld' Python library is required. Install it with: pip install tld")
-
-        full_url = build_parse_url(url, record, module)
-        res: Result = get_tld(full_url, as_object=True)  # type: ignore[assignment]
-
-        # Extract components - use same naming as tld library
-        fld: str = res.fld
-        subdomain: str = res.subdomain if res.subdomain else ''
-        tld: str = res.tld
-        domain: str = res.domain
-
-        # Format record for DNS operations
-        dns_record: str = subdomain if subdomain else '@'
-
-        module.exit_json(
-            changed=False,
-            fld=fld,
-            subdomain=subdomain,
-            record=dns_record,
-            tld=tld,
-            domain=domain
-        )
-
-    except Exception as e:
-        module.fail_json(msg=f"Failed to parse domain: {e!s}")
+            results.append(dict(url=entry, **parse_url(entry, record)))
+        except Exception as e:
+            module.fail_json(msg=f"Failed to parse domain '{entry}': {e!s}")
+
+    module.exit_json(changed=False, results=results)
 
 
 if __name__ == '__main__':
@@ -9,6 +9,8 @@ DOCUMENTATION = """
       - For the '_name' suffix, the fallback uses _var_prefix + '_name' instead of _var_prefix + '_role_name'.
       - For instance names or var prefixes with dashes, checks both original and underscore-converted versions.
       - Automatically converts lists of JSON strings to dictionaries when detected.
+      - Set C(SALTBOX_LOOKUP_TRACE_FILE) to append one JSON line per resolution recording which variable was used.
+      - Role defaults that are literals, or only reference other literal defaults, are folded once per run and returned without templating.
     author: salty
     options:
       _terms:
@@ -62,52 +64,39 @@ from ansible.plugins.lookup import LookupBase
 from ansible.errors import AnsibleLookupError, AnsibleUndefinedVariable, AnsibleValueOmittedError
 from ansible.utils.display import Display
 from typing import Any, List, Optional, Dict
-import json
+import os
+import sys
 
 from jinja2 import Undefined
 
+_MODULE_UTILS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'module_utils')
+if _MODULE_UTILS_PATH not in sys.path:
+    sys.path.append(_MODULE_UTILS_PATH)
+
+from saltbox_lookup import (  # noqa: E402
+    LookupProfiler,
+    LookupTracer,
+    NOT_CONSTANT,
+    cache_template_compilation,
+    constant_default,
+    convert_json_string_list,
+    is_json_string_list,
+)
+
 display = Display()
+tracer = LookupTracer('docker_vars', display)
+profiler = LookupProfiler('docker_vars')
 _OMIT_SENTINEL = object()
 
 class LookupModule(LookupBase):
 
     def _is_json_string_list(self, value: Any) -> bool:
         """Check if value is a list of JSON strings"""
-        if not isinstance(value, list):
-            return False
-
-        # Check if all items are strings that look like JSON objects
-        for item in value:
-            if not isinstance(item, str):
-                return False
-            stripped = item.strip()
-            if not (stripped.startswith('{') and stripped.endswith('}')):
-                return False
-
-        return len(value) > 0
+        return is_json_string_list(value)
 
     def _convert_json_list_to_dict(self, json_list: List[str]) -> Optional[Dict[str, Any]]:
-        """Convert a list of JSON strings to a combined dictionary"""
-        combined_dict: Dict[str, Any] = {}
-
-        for json_str in json_list:
-            try:
-                # Parse the JSON string directly
-                parsed = json.loads(json_str)
-                if isinstance(parsed, dict):
-                    combined_dict.update(parsed)
-                else:
-                    display.warning(f"[docker_vars] JSON string parsed to non-dict: {parsed}")
-                    return None
-            except json.JSONDecodeError as je:
-                display.warning(f"[docker_vars] Invalid JSON in: {json_str[:100]}... Error: {je}")
-                return None
-            except (TypeError, AttributeError) as e:
-                display.warning(f"[docker_vars] Failed to process JSON string: {e}")
-                return None
-
-        display.vvv(f"[docker_vars] Converted JSON list to dict with {len(combined_dict)} keys using manual parsing")
-        return combined_dict
+        """Convert a list of JSON strings to a combined dictionary, reusing cached conversions"""
+        return convert_json_string_list(json_list, tracer)
 
     def _check_for_undefined(self, value: Any, var_name: str) -> None:
         """Recursively check for undefined variables in a result and raise a clear error if found"""
@@ -168,6 +157,7 @@ class LookupModule(LookupBase):
 
     def _resolve_suffix(
         self,
+        templar: Any,
         suffix: str,
         variables: Dict[str, Any],
         default_set: bool,
@@ -180,81 +170,91 @@ class LookupModule(LookupBase):
         instance_names_to_try: List[str],
         var_prefixes_to_try: List[str],
     ) -> Any:
-        if self._templar is None:
-            raise AnsibleLookupError("[docker_vars] Templar is not initialized")
-        templar = self._templar
-
-        vars_to_check = self._build_vars_to_check(suffix, instance_names_to_try, var_prefixes_to_try)
-
-        display.vvv(f"[docker_vars] Checking these keys in order for suffix '{suffix}': {vars_to_check}")
-        if display.verbosity >= 3:
-            debug_keys = sorted([
-                k for k in variables
-                if suffix in k or k.endswith(suffix) or any(k.startswith(prefix) for prefix in instance_names_to_try + var_prefixes_to_try)
-            ])
-            display.vvv(f"[docker_vars] Relevant vars for suffix '{suffix}': {debug_keys}")
-
-        for var_name in vars_to_check:
-            if var_name in variables:
-                raw_value = variables.get(var_name)
-                if raw_value is None:
-                    display.vvv(f"[docker_vars] Skipping {var_name} (value is None)")
-                    continue
-                if omit_token is not None and raw_value is omit_token:
-                    display.vvv(f"[docker_vars] {var_name} is omit — returning omit")
-                    return omit_token
-
-                guard_id = f"docker_var:{var_prefix}:{instance_name}:{suffix}:{var_name}"
-                if guard_id in stack:
-                    cycle = " -> ".join(stack + [guard_id])
-                    raise AnsibleLookupError(
-                        f"[docker_vars] Circular reference detected while resolving '{var_name}' "
-                        f"(prefix='{var_prefix}', instance='{instance_name}', suffix='{suffix}'). Stack: {cycle}"
-                    )
-                stack.append(guard_id)
-                try:
-                    try:
-                        result = templar.template(raw_value, fail_on_undefined=True)
-                    except AnsibleValueOmittedError:
-                        display.vvv(f"[docker_vars] {var_name} templated to omit — returning omit")
+        started = profiler.start()
+
+        try:
+            vars_to_check = self._build_vars_to_check(suffix, instance_names_to_try, var_prefixes_to_try)
+
+            tracer.vvv("Checking these keys in order for suffix '%s': %s", suffix, vars_to_check)
+            if tracer.enabled:
+                debug_keys = sorted([
+                    k for k in variables
+                    if suffix in k or k.endswith(suffix) or any(k.startswith(prefix) for prefix in instance_names_to_try + var_prefixes_to_try)
+                ])
+                tracer.vvv("Relevant vars for suffix '%s': %s", suffix, debug_keys)
+
+            for var_name in vars_to_check:
+                if var_name in variables:
+                    raw_value = variables.get(var_name)
+                    if raw_value is None:
+                        tracer.vvv("Skipping %s (value is None)", var_name)
+                        continue
+                    if omit_token is not None and raw_value is omit_token:
+                        tracer.vvv("%s is omit — returning omit", var_name)
+                        tracer.record('omit', vars_to_check, var_name, prefix=var_prefix, instance=instance_name, suffix=suffix)
                         return omit_token
-                    except Exception as e:
+
+                    guard_id = f"docker_var:{var_prefix}:{instance_name}:{suffix}:{var_name}"
+                    if guard_id in stack:
+                        cycle = " -> ".join(stack + [guard_id])
                         raise AnsibleLookupError(
-                            f"[docker_vars] Failed to resolve '{var_name}': {e}"
-                        ) from e
-                    if omit_token is not None and result is omit_token:
-                        display.vvv(f"[docker_vars] {var_name} resolved to omit — returning omit")
-                        return omit_token
-                    self._check_for_undefined(result, var_name)
-                    if result is not None:
-                        if convert_json and self._is_json_string_list(result):
-                            display.vvv(f"[docker_vars] Found JSON string list for {var_name}, converting to dict")
-                            converted = self._convert_json_list_to_dict(result)
-                            if converted is not None:
-                                return converted
-                            else:
-                                display.vvv(f"[docker_vars] Conversion failed, returning original list")
-
-                        display.vvv(f"[docker_vars] Returning templated value for {var_name}: {result}")
-                        return result
-                    else:
-                        display.vvv(f"[docker_vars] {var_name} is None after templating, skipping")
-                finally:
-                    if stack and stack[-1] == guard_id:
-                        stack.pop()
-                    elif guard_id in stack:
-                        stack.remove(guard_id)
-            else:
-                display.vvv(f"[docker_vars] {var_name} not found in variables — skipping")
+                            f"[docker_vars] Circular reference detected while resolving '{var_name}' "
+                            f"(prefix='{var_prefix}', instance='{instance_name}', suffix='{suffix}'). Stack: {cycle}"
+                        )
+                    stack.append(guard_id)
+                    try:
+                        try:
+                            result = constant_default(var_name, raw_value, variables)
+                            if result is NOT_CONSTANT:
+                                result = templar.template(raw_value, fail_on_undefined=True)
+                        except AnsibleValueOmittedError:
+                            tracer.vvv("%s templated to omit — returning omit", var_name)
+                            tracer.record('omit', vars_to_check, var_name, prefix=var_prefix, instance=instance_name, suffix=suffix)
+                            return omit_token
+                        except Exception as e:
+                            raise AnsibleLookupError(
+                                f"[docker_vars] Failed to resolve '{var_name}': {e}"
+                            ) from e
+                        if omit_token is not None and result is omit_token:
+                            tracer.vvv("%s resolved to omit — returning omit", var_name)
+                            tracer.record('omit', vars_to_check, var_name, prefix=var_prefix, instance=instance_name, suffix=suffix)
+                            return omit_token
+                        self._check_for_undefined(result, var_name)
+                        if result is not None:
+                            if convert_json and self._is_json_string_list(result):
+                                tracer.vvv("Found JSON string list for %s, converting to dict", var_name)
+                                converted = self._convert_json_list_to_dict(result)
+                                if converted is not None:
+                                    tracer.record('variable', vars_to_check, var_name, prefix=var_prefix, instance=instance_name, suffix=suffix)
+                                    return converted
+                                else:
+                                    tracer.vvv("Conversion failed, returning original list")
+
+                            tracer.vvv("Returning templated value for %s: %s", var_name, result)
+                            tracer.record('variable', vars_to_check, var_name, prefix=var_prefix, instance=instance_name, suffix=suffix)
+                            return result
+                        else:
+                            tracer.vvv("%s is None after templating, skipping", var_name)
+                    finally:
+                        if stack and stack[-1] == guard_id:
+                            stack.pop()
+                        elif guard_id in stack:
+                            stack.remove(guard_id)
+                else:
+                    tracer.vvv("%s not found in variables — skipping", var_name)
 
-        if default_set:
-            display.vvv(f"[docker_vars] No usable variable found for suffix '{suffix}', returning default: {default}")
-            return default
+            if default_set:
+                tracer.vvv("No usable variable found for suffix '%s', returning default: %s", suffix, default)
+                tracer.record('default', vars_to_check, prefix=var_prefix, instance=instance_name, suffix=suffix)
+                return default
 
-        raise AnsibleLookupError(
-            f"[docker_vars] Variable not found and no default provided for suffix '{suffix}'. "
-            f"Tried the following variables in order: {', '.join(vars_to_check)}"
-        )
+            tracer.record('missing', vars_to_check, prefix=var_prefix, instance=instance_name, suffix=suffix)
+            raise AnsibleLookupError(
+                f"[docker_vars] Variable not found and no default provided for suffix '{suffix}'. "
+                f"Tried the following variables in order: {', '.join(vars_to_check)}"
+            )
+        finally:
+            profiler.stop(started, var_prefix, suffix)
 
     def run(self, terms: List[Any], variables: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Any]:  # type: ignore[override]
         if variables is None:
@@ -292,6 +292,7 @@ class LookupModule(LookupBase):
             variables[stack_key] = []
             stack_owner = True
         stack = variables[stack_key]
+        templar = cache_template_compilation(self._templar)
 
         try:
             if '_var_prefix' not in variables:
@@ -299,20 +300,20 @@ class LookupModule(LookupBase):
             if '_instance_name' not in variables:
                 raise KeyError("[docker_vars] Required variable '_instance_name' not found")
 
-            var_prefix: str = self._templar.template(variables['_var_prefix'], fail_on_undefined=True)
-            instance_name: str = self._templar.template(variables['_instance_name'], fail_on_undefined=True)
+            var_prefix: str = templar.template(variables['_var_prefix'], fail_on_undefined=True)
+            instance_name: str = templar.template(variables['_instance_name'], fail_on_undefined=True)
 
             instance_names_to_try: List[str] = [instance_name]
             if '-' in instance_name:
                 underscore_instance: str = instance_name.replace('-', '_')
                 instance_names_to_try.append(underscore_instance)
-                display.vvv(f"[docker_vars] Added underscore variant for instance: {underscore_instance}")
+                tracer.vvv("Added underscore variant for instance: %s", underscore_instance)
 
             var_prefixes_to_try: List[str] = [var_prefix]
             if '-' in var_prefix:
                 underscore_prefix: str = var_prefix.replace('-', '_')
                 var_prefixes_to_try.append(underscore_prefix)
-                display.vvv(f"[docker_vars] Added underscore variant for prefix: {underscore_prefix}")
+                tracer.vvv("Added underscore variant for prefix: %s", underscore_prefix)
 
             results: Dict[str, Any] = {}
             for suffix in suffixes:
@@ -341,6 +342,7 @@ class LookupModule(LookupBase):
                         default_value = None
 
                     resolved = self._resolve_suffix(
+                        templar=templar,
                         suffix=suffix,
                         variables=variables,
                         default_set=default_set,
@@ -369,6 +371,7 @@ class LookupModule(LookupBase):
                     default_set = bool(defaults) and suffix in defaults
                     default_value: Any = defaults[suffix] if default_set else None
                     results[suffix] = self._resolve_suffix(
+                        templar=templar,
                         suffix=suffix,
                         variables=variables,
                         default_set=default_set,
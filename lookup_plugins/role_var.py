@@ -10,6 +10,8 @@ DOCUMENTATION = """
       - When 'role' parameter is specified, constructs the appropriate traefik_role_var for that role
       - For _name variables with dashes, checks both original and underscore-converted versions
       - Automatically converts lists of JSON strings to dictionaries when detected
+      - Set C(SALTBOX_LOOKUP_TRACE_FILE) to append one JSON line per resolution recording which variable was used
+      - Role defaults that are literals, or only reference other literal defaults, are folded once per run and returned without templating
     author: salty
     options:
       _terms:
@@ -43,51 +45,38 @@ from ansible.plugins.lookup import LookupBase
 from ansible.errors import AnsibleLookupError, AnsibleUndefinedVariable, AnsibleValueOmittedError
 from ansible.utils.display import Display
 from typing import Any, List, Optional, Dict
-import json
+import os
+import sys
 
 from jinja2 import Undefined
 
+_MODULE_UTILS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'module_utils')
+if _MODULE_UTILS_PATH not in sys.path:
+    sys.path.append(_MODULE_UTILS_PATH)
+
+from saltbox_lookup import (  # noqa: E402
+    LookupProfiler,
+    LookupTracer,
+    NOT_CONSTANT,
+    cache_template_compilation,
+    constant_default,
+    convert_json_string_list,
+    is_json_string_list,
+)
+
 display = Display()
+tracer = LookupTracer('role_var', display)
+profiler = LookupProfiler('role_var')
 
 class LookupModule(LookupBase):
 
     def _is_json_string_list(self, value: Any) -> bool:
         """Check if value is a list of JSON strings"""
-        if not isinstance(value, list):
-            return False
-        
-        # Check if all items are strings that look like JSON objects
-        for item in value:
-            if not isinstance(item, str):
-                return False
-            stripped = item.strip()
-            if not (stripped.startswith('{') and stripped.endswith('}')):
-                return False
-        
-        return len(value) > 0
+        return is_json_string_list(value)
 
     def _convert_json_list_to_dict(self, json_list: List[str]) -> Optional[Dict[str, Any]]:
-        """Convert a list of JSON strings to a combined dictionary"""
-        combined_dict: Dict[str, Any] = {}
-
-        for json_str in json_list:
-            try:
-                # Parse the JSON string directly
-                parsed = json.loads(json_str)
-                if isinstance(parsed, dict):
-                    combined_dict.update(parsed)
-                else:
-                    display.warning(f"[role_var] JSON string parsed to non-dict: {parsed}")
-                    return None
-            except json.JSONDecodeError as je:
-                display.warning(f"[role_var] Invalid JSON in: {json_str[:100]}... Error: {je}")
-                return None
-            except (TypeError, AttributeError) as e:
-                display.warning(f"[role_var] Failed to process JSON string: {e}")
-                return None
-
-        display.vvv(f"[role_var] Converted JSON list to dict with {len(combined_dict)} keys using manual parsing")
-        return combined_dict
+        """Convert a list of JSON strings to a combined dictionary, reusing cached conversions"""
+        return convert_json_string_list(json_list, tracer)
 
     def _check_for_undefined(self, value: Any, var_name: str) -> None:
         """Recursively check for undefined variables in a result and raise a clear error if found"""
@@ -144,15 +133,18 @@ class LookupModule(LookupBase):
             variables[stack_key] = []
             stack_owner = True
         stack = variables[stack_key]
+        role_name: str = ''
+        started = profiler.start()
+        templar = cache_template_compilation(self._templar)
 
         try:
             # Use specified role if provided, otherwise fall back to role_name
             if specified_role:
-                role_name: str = self._templar.template(specified_role, fail_on_undefined=True)
+                role_name = templar.template(specified_role, fail_on_undefined=True)
             else:
                 if 'role_name' not in variables:
                     raise KeyError("[role_var] Required variable 'role_name' not found")
-                role_name: str = self._templar.template(variables['role_name'], fail_on_undefined=True)
+                role_name = templar.template(variables['role_name'], fail_on_undefined=True)
             
             # If a custom role is specified, we need to construct the appropriate traefik_role_var for that role
             traefik_role_var: str
@@ -160,14 +152,14 @@ class LookupModule(LookupBase):
                 # Replicate the logic: traefik_role_var: "{{ lookup('vars', role_name + '_name', default=role_name) }}"
                 custom_role_name_var: str = role_name + '_name'
                 if custom_role_name_var in variables:
-                    traefik_role_var = self._templar.template(variables[custom_role_name_var], fail_on_undefined=True)
+                    traefik_role_var = templar.template(variables[custom_role_name_var], fail_on_undefined=True)
                 else:
                     traefik_role_var = role_name
-                display.vvv(f"[role_var] Using custom traefik_role_var for role '{role_name}': {traefik_role_var}")
+                tracer.vvv("Using custom traefik_role_var for role '%s': %s", role_name, traefik_role_var)
             else:
                 if 'traefik_role_var' not in variables:
                     raise KeyError("[role_var] Required variable 'traefik_role_var' not found")
-                traefik_role_var = self._templar.template(variables['traefik_role_var'], fail_on_undefined=True)
+                traefik_role_var = templar.template(variables['traefik_role_var'], fail_on_undefined=True)
 
             # Build the variable names to check
             primary_var: str
@@ -188,25 +180,26 @@ class LookupModule(LookupBase):
                 if '-' in var_name:
                     underscore_var = var_name.replace('-', '_')
                     vars_to_check.append(underscore_var)
-                    display.vvv(f"[role_var] Added underscore variant: {underscore_var} for {var_name}")
+                    tracer.vvv("Added underscore variant: %s for %s", underscore_var, var_name)
 
-            display.vvv(f"[role_var] Checking these keys in order: {vars_to_check}")
-            if display.verbosity >= 3:
+            tracer.vvv("Checking these keys in order: %s", vars_to_check)
+            if tracer.enabled:
                 debug_keys = sorted([
                     k for k in variables
                     if suffix in k or k.endswith(suffix) or k.startswith((traefik_role_var, role_name))
                 ])
-                display.vvv(f"[role_var] Relevant vars: {debug_keys}")
+                tracer.vvv("Relevant vars: %s", debug_keys)
 
             # Try each variable name in order
             for var_name in vars_to_check:
                 if var_name in variables:
                     raw_value = variables.get(var_name)
                     if raw_value is None:
-                        display.vvv(f"[role_var] Skipping {var_name} (value is None)")
+                        tracer.vvv("Skipping %s (value is None)", var_name)
                         continue
                     if omit_token is not None and raw_value is omit_token:
-                        display.vvv(f"[role_var] {var_name} is omit — returning omit")
+                        tracer.vvv("%s is omit — returning omit", var_name)
+                        tracer.record('omit', vars_to_check, var_name, role=role_name, suffix=suffix)
                         return [omit_token]
 
                     guard_id = f"role_var:{role_name}:{suffix}:{var_name}"
@@ -221,52 +214,61 @@ class LookupModule(LookupBase):
                         # Variable exists - if templating fails, that's an error (don't fall back to default)
                         # This ensures that variables referencing undefined vars are caught
                         try:
-                            result = self._templar.template(raw_value, fail_on_undefined=True)
+                            result = constant_default(var_name, raw_value, variables)
+                            if result is NOT_CONSTANT:
+                                result = templar.template(raw_value, fail_on_undefined=True)
                         except AnsibleValueOmittedError:
-                            display.vvv(f"[role_var] {var_name} templated to omit — returning omit")
+                            tracer.vvv("%s templated to omit — returning omit", var_name)
+                            tracer.record('omit', vars_to_check, var_name, role=role_name, suffix=suffix)
                             return [omit_token]
                         except Exception as e:
                             raise AnsibleLookupError(
                                 f"[role_var] Failed to resolve '{var_name}': {e}"
                             ) from e
                         if omit_token is not None and result is omit_token:
-                            display.vvv(f"[role_var] {var_name} resolved to omit — returning omit")
+                            tracer.vvv("%s resolved to omit — returning omit", var_name)
+                            tracer.record('omit', vars_to_check, var_name, role=role_name, suffix=suffix)
                             return [omit_token]
                         # Check for undefined variables that got captured instead of raising
                         self._check_for_undefined(result, var_name)
                         if result is not None:
                             # Check if we should convert JSON list to dict
                             if convert_json and self._is_json_string_list(result):
-                                display.vvv(f"[role_var] Found JSON string list for {var_name}, converting to dict")
+                                tracer.vvv("Found JSON string list for %s, converting to dict", var_name)
                                 converted = self._convert_json_list_to_dict(result)
                                 if converted is not None:
+                                    tracer.record('variable', vars_to_check, var_name, role=role_name, suffix=suffix)
                                     return [converted]
                                 else:
-                                    display.vvv(f"[role_var] Conversion failed, returning original list")
+                                    tracer.vvv("Conversion failed, returning original list")
 
-                            display.vvv(f"[role_var] Returning templated value for {var_name}: {result}")
+                            tracer.vvv("Returning templated value for %s: %s", var_name, result)
+                            tracer.record('variable', vars_to_check, var_name, role=role_name, suffix=suffix)
                             return [result]
                         else:
-                            display.vvv(f"[role_var] {var_name} is None after templating, skipping")
+                            tracer.vvv("%s is None after templating, skipping", var_name)
                     finally:
                         if stack and stack[-1] == guard_id:
                             stack.pop()
                         elif guard_id in stack:
                             stack.remove(guard_id)
                 else:
-                    display.vvv(f"[role_var] {var_name} not found in variables — skipping")
+                    tracer.vvv("%s not found in variables — skipping", var_name)
 
             # If we have a default, use it (only reached if no variable existed)
             if default is not None:
-                display.vvv(f"[role_var] No usable variable found, returning default: {default}")
+                tracer.vvv("No usable variable found, returning default: %s", default)
+                tracer.record('default', vars_to_check, role=role_name, suffix=suffix)
                 return [default]
 
             # Otherwise raise an error - variable not found and no default provided
+            tracer.record('missing', vars_to_check, role=role_name, suffix=suffix)
             raise AnsibleLookupError(
                 f"[role_var] Variable not found and no default provided. "
                 f"Tried the following variables in order: {', '.join(vars_to_check)}"
             )
         finally:
+            profiler.stop(started, role_name, suffix)
             if stack_owner:
                 if stack_prev is None:
                     variables.pop(stack_key, None)
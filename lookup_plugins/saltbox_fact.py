@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+DOCUMENTATION = """
+    name: saltbox_fact
+    description:
+      - Reads facts saved by the saltbox_facts module from {base_path}/saltbox/{role}.ini
+      - Returns the value of each key given as a term, or the whole instance as a dictionary when no terms are given
+      - Parsed files are cached per process and reused while their inode, modification time and size are unchanged
+      - Keys saved as 'None' are treated as missing, like the saltbox_facts module does
+    author: salty
+    options:
+      _terms:
+        description: The keys to read
+        required: false
+      role:
+        description: The role whose facts file is read
+        type: str
+        required: true
+      instance:
+        description: The instance (INI section) to read
+        type: str
+        required: true
+      base_path:
+        description: Base directory holding the saltbox facts directory (defaults to server_appdata_path)
+        type: str
+        required: false
+      default:
+        description: The value returned for missing keys, sections or files
+        type: raw
+        required: false
+        default: ''
+"""
+
+EXAMPLES = """
+- name: Read the token of a Plex instance
+  debug:
+    msg: "{{ lookup('saltbox_fact', 'token', role='plex', instance=plex_name) }}"
+
+- name: Read every saved fact of an instance
+  debug:
+    msg: "{{ lookup('saltbox_fact', role='plex', instance=plex_name) }}"
+"""
+
+from ansible.plugins.lookup import LookupBase
+from ansible.errors import AnsibleLookupError
+from typing import Any, List, Optional, Dict
+import os
+import sys
+
+_MODULE_UTILS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'module_utils')
+if _MODULE_UTILS_PATH not in sys.path:
+    sys.path.append(_MODULE_UTILS_PATH)
+
+from saltbox_facts_store import (  # noqa: E402
+    cached_config,
+    get_file_path,
+    section_facts,
+    validate_instance_name,
+)
+
+
+class LookupModule(LookupBase):
+
+    def run(self, terms: List[str], variables: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Any]:  # type: ignore[override]
+        if variables is None:
+            variables = {}
+
+        self.set_options(var_options=variables, direct=kwargs)
+        role: str = self.get_option('role')
+        instance: str = self.get_option('instance')
+        base_path: Optional[str] = self.get_option('base_path')
+        default: Any = self.get_option('default')
+
+        if not base_path:
+            if 'server_appdata_path' not in variables:
+                raise AnsibleLookupError("[saltbox_fact] Either 'base_path' or the variable 'server_appdata_path' is required")
+            base_path = self._templar.template(variables['server_appdata_path'], fail_on_undefined=True)
+
+        try:
+            validate_instance_name(instance)
+            config = cached_config(get_file_path(role, base_path))
+        except (ValueError, OSError) as e:
+            raise AnsibleLookupError(f"[saltbox_fact] {e}") from e
+
+        facts: Dict[str, str] = section_facts(config, instance) if config is not None else {}
+
+        if not terms:
+            return [facts]
+        return [facts.get(key, default) for key in terms]
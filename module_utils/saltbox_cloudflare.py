@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+
+"""Shared Cloudflare helpers for Saltbox modules."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, TypeVar
+
+if TYPE_CHECKING:
+    from cloudflare import Cloudflare
+
+T = TypeVar('T')
+
+DEFAULT_ZONE_CACHE_PATH = '/opt/saltbox/cloudflare_zones.json'
+DEFAULT_ZONE_CACHE_TTL = 86400
+
+# Page size for zone-wide record listings, so most zones need one request.
+RECORDS_PER_PAGE = 5000
+PAGE_WORKERS = 4
+
+# Up to this many record names are fetched with one name.exact query each
+# instead of listing the whole zone.
+NAME_QUERY_LIMIT = 10
+
+
+class ZoneNotFoundError(Exception):
+    """Raised when Cloudflare has no zone of the requested name."""
+
+
+class ZoneLookupError(Exception):
+    """Raised when the zone lookup request itself fails."""
+
+
+def credentials_fingerprint(auth_email: str | None, auth_key: str | None, auth_token: str | None) -> str:
+    """
+    Return a hash identifying the credentials without storing them.
+    """
+    material = f"token:{auth_token}" if auth_token else f"key:{auth_email}:{auth_key}"
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class ZoneIdCache:
+    """
+    On-disk cache of zone IDs shared by the Cloudflare modules.
+
+    Entries are stored per zone name together with a fingerprint of the
+    credentials that looked them up, so a change of account or API key
+    misses the cache. The cache is skipped when its directory does not exist
+    or a TTL of 0 is given, and failures to read or write it are ignored as
+    the zone can always be looked up again.
+    """
+
+    def __init__(self, path: str | None, ttl: int, fingerprint: str) -> None:
+        self.path = path or ''
+        self.ttl = ttl
+        self.fingerprint = fingerprint
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path) and self.ttl > 0 and os.path.isdir(os.path.dirname(self.path) or '.')
+
+    def _read(self) -> dict[str, Any]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as cache_file:
+                data = json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _write(self, data: dict[str, Any]) -> None:
+        directory = os.path.dirname(self.path) or '.'
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.cloudflare_zones.')
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as cache_file:
+                json.dump(data, cache_file, indent=2, sort_keys=True)
+            os.chmod(temp_path, 0o600)
+            os.replace(temp_path, self.path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def get(self, zone_name: str) -> str | None:
+        """
+        Return the cached zone ID, or None if missing, expired or looked up
+        with other credentials.
+        """
+        if not self.enabled:
+            return None
+        entry = self._read().get(zone_name)
+        if not isinstance(entry, dict) or entry.get('credentials') != self.fingerprint:
+            return None
+        try:
+            if float(entry['expires']) <= time.time():
+                return None
+        except (KeyError, TypeError, ValueError):
+            return None
+        zone_id = entry.get('zone_id')
+        return zone_id if isinstance(zone_id, str) and zone_id else None
+
+    def set(self, zone_name: str, zone_id: str) -> None:
+        if not self.enabled:
+            return
+        now = time.time()
+        data = {
+            name: entry for name, entry in self._read().items()
+            if isinstance(entry, dict) and isinstance(entry.get('expires'), (int, float)) and entry['expires'] > now
+        }
+        data[zone_name] = dict(zone_id=zone_id, credentials=self.fingerprint, expires=now + self.ttl)
+        self._write(data)
+
+    def invalidate(self, zone_name: str) -> None:
+        if not self.enabled:
+            return
+        data = self._read()
+        if data.pop(zone_name, None) is not None:
+            self._write(data)
+
+
+def lookup_zone_id(client: "Cloudflare", zone_name: str) -> str:
+    """
+    Fetch the zone ID for a given zone name from Cloudflare.
+
+    Raises:
+        ZoneNotFoundError: If the zone does not exist
+        ZoneLookupError: If the request fails
+    """
+    try:
+        zone = client.zones.list(name=zone_name)
+    except Exception as e:
+        raise ZoneLookupError(str(e)) from e
+    if len(zone.result) == 0:
+        raise ZoneNotFoundError(zone_name)
+    return zone.result[0].id
+
+
+def with_zone_id(
+    client: "Cloudflare",
+    zone_name: str,
+    cache: ZoneIdCache,
+    operation: Callable[[str], T]
+) -> tuple[str, T]:
+    """
+    Run an API operation that needs the zone's ID, taking the ID from the
+    cache when possible.
+
+    A cached ID the API answers with 404, 401 or 403 is dropped, since the
+    zone may have been re-created or the credentials may no longer reach it,
+    and the operation is retried once with a freshly looked up ID.
+
+    Args:
+        client: Cloudflare client instance
+        zone_name (str): Name of the zone
+        cache (ZoneIdCache): Zone ID cache
+        operation (callable): Called with the zone ID
+
+    Returns:
+        tuple: (zone ID, result of the operation)
+
+    Raises:
+        ZoneNotFoundError, ZoneLookupError: If the zone lookup fails
+        Exception: Whatever the operation raises
+    """
+    from cloudflare import AuthenticationError, NotFoundError, PermissionDeniedError
+
+    zone_id = cache.get(zone_name)
+    if zone_id is not None:
+        try:
+            return zone_id, operation(zone_id)
+        except (NotFoundError, AuthenticationError, PermissionDeniedError):
+            cache.invalidate(zone_name)
+
+    zone_id = lookup_zone_id(client, zone_name)
+    cache.set(zone_name, zone_id)
+    return zone_id, operation(zone_id)
+
+
+def page_count(page: Any) -> int | None:
+    """
+    Return the total number of pages reported with a listing page, or None if
+    the response does not say.
+    """
+    info = getattr(page, 'result_info', None)
+    total_pages = getattr(info, 'total_pages', None)
+    if isinstance(total_pages, int) and total_pages >= 1:
+        return total_pages
+    total_count = getattr(info, 'total_count', None)
+    per_page = getattr(info, 'per_page', None)
+    if isinstance(total_count, int) and isinstance(per_page, int) and per_page > 0:
+        return max(1, -(-total_count // per_page))
+    return None
+
+
+def list_zone_records(
+    client: "Cloudflare",
+    zone_id: str,
+    workers: int = PAGE_WORKERS,
+    **filters: Any
+) -> list[dict[str, Any]]:
+    """
+    Fetch every DNS record of a zone, or those matching the given filters.
+
+    The first page reports the page count, and the remaining pages are then
+    fetched concurrently. If the count is missing from the response, pages
+    are followed one by one instead.
+
+    Args:
+        client: Cloudflare client instance
+        zone_id (str): The Cloudflare zone ID
+        workers (int): Maximum number of concurrent page requests
+        filters: Passed on to the records listing, e.g. name={'exact': name}
+
+    Returns:
+        list: Records in API order
+
+    Raises:
+        Exception: If a request fails
+    """
+    first = client.dns.records.list(zone_id=zone_id, per_page=RECORDS_PER_PAGE, page=1, **filters)
+    if first is None:
+        raise ValueError("No response from Cloudflare API")
+
+    total_pages = page_count(first)
+    if total_pages is None:
+        return [record.to_dict() for page in first.iter_pages() for record in page.result]
+
+    records = [record.to_dict() for record in first.result]
+    if total_pages > 1:
+        def fetch_page(page: int) -> list[Any]:
+            return client.dns.records.list(zone_id=zone_id, per_page=RECORDS_PER_PAGE, page=page, **filters).result
+
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, total_pages - 1))) as executor:
+            for result in executor.map(fetch_page, range(2, total_pages + 1)):
+                records.extend(record.to_dict() for record in result)
+    return records
+
+
+def list_named_records(
+    client: "Cloudflare",
+    zone_id: str,
+    names: list[str],
+    workers: int = PAGE_WORKERS
+) -> list[dict[str, Any]]:
+    """
+    Fetch the DNS records of the given names with one name.exact query per
+    name, run concurrently.
+
+    Returns:
+        list: Records grouped by name in the order of names
+
+    Raises:
+        Exception: If a request fails
+    """
+    if not names:
+        return []
+
+    def fetch_name(name: str) -> list[dict[str, Any]]:
+        return list_zone_records(client, zone_id, workers=1, name={'exact': name})
+
+    records: list[dict[str, Any]] = []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(names)))) as executor:
+        for result in executor.map(fetch_name, names):
+            records.extend(result)
+    return records
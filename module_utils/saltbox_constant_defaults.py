@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+"""Constant folding of Saltbox role defaults for the variable lookups."""
+
+from __future__ import annotations
+
+import glob
+import os
+import re
+from typing import Any
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+
+DEFAULTS_PATTERNS = (
+    os.path.join('roles', '*', 'defaults', 'main.yml'),
+    os.path.join('resources', 'roles', '*', 'defaults', 'main.yml'),
+)
+
+# Anything that may make the templar treat a string as a template.
+TEMPLATE_MARKERS = ('{{', '{%', '{#', '#jinja2:')
+
+# A template made only of literal text and plain {{ name }} references.
+_REFERENCE = re.compile(r'\{\{ *([A-Za-z_][A-Za-z0-9_]*) *\}\}')
+_JINJA_CONSTANTS = frozenset({'true', 'false', 'none', 'True', 'False', 'None'})
+
+# Constant defaults keyed by variable name. Each entry holds the raw value as
+# written in the defaults file, the folded value and the raw values of the
+# defaults it was folded from.
+_constant_defaults: dict[str, tuple[Any, Any, dict[str, str]]] | None = None
+
+
+def is_literal(value: Any) -> bool:
+    """
+    Check if a loaded YAML value contains no template syntax at any depth.
+
+    Args:
+        value: Value from a defaults file
+
+    Returns:
+        bool: True if templating the value would return it unchanged
+    """
+    if isinstance(value, str):
+        return not any(marker in value for marker in TEMPLATE_MARKERS)
+    if isinstance(value, dict):
+        return all(is_literal(key) and is_literal(item) for key, item in value.items())
+    if isinstance(value, list):
+        return all(is_literal(item) for item in value)
+    return value is None or isinstance(value, (bool, int, float))
+
+
+def _references(value: str) -> list[str] | None:
+    """Return the names referenced by a reference-only template, or None."""
+    names = _REFERENCE.findall(value)
+    if not names or any(name in _JINJA_CONSTANTS for name in names):
+        return None
+    if not is_literal(_REFERENCE.sub('', value)) or value.endswith('\n'):
+        return None
+    return names
+
+
+def read_role_defaults(base_path: str) -> dict[str, Any]:
+    """
+    Load the raw defaults of every role below base_path.
+
+    Files that fail to parse are skipped. A variable defined with different
+    values in several files is left out, as its winner depends on the play.
+
+    Args:
+        base_path (str): Repository root
+
+    Returns:
+        dict: Raw default values keyed by variable name
+    """
+    defaults: dict[str, Any] = {}
+    conflicting: set[str] = set()
+
+    for pattern in DEFAULTS_PATTERNS:
+        for path in sorted(glob.glob(os.path.join(base_path, pattern))):
+            try:
+                with open(path, 'r', encoding='utf-8') as defaults_file:
+                    data = yaml.load(defaults_file, Loader=_Loader)
+            except (OSError, yaml.YAMLError):
+                continue
+            if not isinstance(data, dict):
+                continue
+
+            for name, value in data.items():
+                if not isinstance(name, str):
+                    continue
+                if name in defaults and defaults[name] != value:
+                    conflicting.add(name)
+                defaults[name] = value
+
+    for name in conflicting:
+        del defaults[name]
+    return defaults
+
+
+def fold_constant_defaults(defaults: dict[str, Any]) -> dict[str, tuple[Any, Any, dict[str, str]]]:
+    """
+    Find the defaults whose value is known without templating.
+
+    A default is constant when it contains no template syntax, or when it is a
+    string made only of literal text and {{ name }} references to constant
+    string defaults. References are substituted, so for example
+    "{{ sonarr_role_paths_folder }}.db" folds once its target is a literal.
+
+    Args:
+        defaults (dict): Raw default values keyed by variable name
+
+    Returns:
+        dict: (raw value, folded value, raw values of the referenced defaults)
+              keyed by variable name
+    """
+    constants: dict[str, tuple[Any, Any, dict[str, str]]] = {}
+    resolving: set[str] = set()
+
+    def fold(name: str) -> bool:
+        if name in constants:
+            return True
+        if name not in defaults or name in resolving:
+            return False
+
+        value = defaults[name]
+        if is_literal(value):
+            constants[name] = (value, value, {})
+            return True
+        if not isinstance(value, str):
+            return False
+
+        names = _references(value)
+        if names is None:
+            return False
+
+        resolving.add(name)
+        try:
+            if not all(fold(reference) and isinstance(constants[reference][1], str) for reference in names):
+                return False
+        finally:
+            resolving.discard(name)
+
+        dependencies: dict[str, str] = {}
+        for reference in names:
+            source, _, nested = constants[reference]
+            dependencies[reference] = source
+            dependencies.update(nested)
+        folded = _REFERENCE.sub(lambda match: constants[match.group(1)][1], value)
+        constants[name] = (value, folded, dependencies)
+        return True
+
+    for name in defaults:
+        fold(name)
+    return constants
+
+
+def load_constant_defaults(base_path: str) -> dict[str, tuple[Any, Any, dict[str, str]]]:
+    """
+    Return the constant role defaults of the repository, computing them once
+    per process.
+
+    Args:
+        base_path (str): Repository root
+
+    Returns:
+        dict: See fold_constant_defaults
+    """
+    global _constant_defaults
+    if _constant_defaults is None:
+        _constant_defaults = fold_constant_defaults(read_role_defaults(base_path))
+    return _constant_defaults
@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+
+"""
+Reading, validation and merging of Saltbox role fact files.
+
+Shared by the saltbox_facts module, its controller-side action plugin and
+the saltbox_fact lookup. Nothing in here writes to disk.
+"""
+
+from __future__ import annotations
+
+import configparser
+import grp
+import os
+import pwd
+from io import StringIO
+from typing import Any
+
+# Parsed role files keyed by path, with the signature of the version parsed.
+_config_cache: dict[str, tuple[tuple[int, int, int, int], configparser.ConfigParser]] = {}
+
+
+def create_config_parser() -> configparser.ConfigParser:
+    """
+    Create a consistently configured, case-sensitive INI parser.
+    """
+    config = configparser.ConfigParser(
+        interpolation=None,
+        comment_prefixes=('#',),
+        inline_comment_prefixes=None,
+        default_section='DEFAULT',
+        delimiters=('=',),
+        empty_lines_in_values=False
+    )
+    config.optionxform = str
+    return config
+
+
+def read_config(file_path: str) -> configparser.ConfigParser:
+    """
+    Read an INI file while surfacing filesystem and parsing errors.
+    """
+    return read_config_state(file_path)[0]
+
+
+def file_signature(stat_result: os.stat_result | None) -> tuple[int, int, int, int] | None:
+    """
+    Identify a version of a file by device, inode, modification time and size.
+    """
+    if stat_result is None:
+        return None
+    return stat_result.st_dev, stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size
+
+
+def current_signature(file_path: str) -> tuple[int, int, int, int] | None:
+    """
+    Return the signature of the file currently at file_path, or None if it is missing.
+    """
+    try:
+        return file_signature(os.stat(file_path))
+    except FileNotFoundError:
+        return None
+
+
+def read_config_state(
+    file_path: str
+) -> tuple[configparser.ConfigParser, str | None, os.stat_result | None]:
+    """
+    Parse an INI file once, keeping what is needed to rewrite it safely.
+
+    Args:
+        file_path (str): Path to the configuration file
+
+    Returns:
+        tuple: (parsed configuration, file contents or None if missing,
+                stat of the file that was read or None if missing)
+    """
+    config = create_config_parser()
+    try:
+        with open(file_path, 'r', encoding='utf-8') as config_file:
+            file_stat = os.fstat(config_file.fileno())
+            content = config_file.read()
+    except FileNotFoundError:
+        return config, None, None
+    except OSError as error:
+        raise OSError(f"Unable to read configuration file '{file_path}': {error}") from error
+
+    try:
+        config.read_string(content, source=file_path)
+    except configparser.Error as error:
+        raise ValueError(f"Configuration parsing error in '{file_path}': {error}") from error
+    return config, content, file_stat
+
+
+def cached_config(file_path: str) -> configparser.ConfigParser | None:
+    """
+    Return a parsed INI file, reusing the previous parse while it is unchanged.
+
+    A repeated read costs one stat. The cached parse is dropped as soon as the
+    file's device, inode, modification time or size differ, which includes
+    every atomic replacement made by saltbox_facts. The returned parser is
+    shared and must not be modified.
+
+    Args:
+        file_path (str): Path to the configuration file
+
+    Returns:
+        ConfigParser: Parsed configuration, or None if the file does not exist
+    """
+    try:
+        signature = file_signature(os.stat(file_path))
+    except FileNotFoundError:
+        _config_cache.pop(file_path, None)
+        return None
+
+    cached = _config_cache.get(file_path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    config, _, file_stat = read_config_state(file_path)
+    if file_stat is None:
+        _config_cache.pop(file_path, None)
+        return None
+    _config_cache[file_path] = (file_signature(file_stat), config)
+    return config
+
+
+def render_config(config: configparser.ConfigParser) -> str:
+    """
+    Render a parsed configuration back to INI text.
+    """
+    with StringIO() as string_buffer:
+        config.write(string_buffer)
+        return string_buffer.getvalue()
+
+
+def validate_instance_name(instance: Any) -> None:
+    """
+    Validate that the instance name is a string.
+
+    Args:
+        instance: Value to validate as instance name
+
+    Raises:
+        ValueError: If instance is not a string
+    """
+    if not isinstance(instance, str):
+        raise ValueError("Instance name must be a string")
+    if not instance.strip():
+        raise ValueError("Instance name must be non-empty")
+    if instance == configparser.DEFAULTSECT:
+        raise ValueError(f"Instance name must not be '{configparser.DEFAULTSECT}'")
+    if any(character in instance for character in ('\r', '\n', '[', ']')):
+        raise ValueError("Instance name must not contain line breaks or square brackets")
+
+
+def validate_key_name(key: Any) -> None:
+    """
+    Validate that a key can be represented without changing its INI identity.
+    """
+    if not isinstance(key, str):
+        raise ValueError(f"Invalid key '{key}': must be a string")
+    if not key.strip():
+        raise ValueError("Configuration keys must be non-empty")
+    if any(character in key for character in ('\r', '\n', '=')):
+        raise ValueError(f"Invalid key '{key}': must not contain line breaks or '='")
+    if key.lstrip().startswith('#'):
+        raise ValueError(f"Invalid key '{key}': must not be interpreted as a comment")
+
+
+def normalize_instances(instances: Any, keys: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """
+    Expand the instances parameter into keys per instance.
+
+    Args:
+        instances (list or dict): Instance names, or instance names mapped to their own keys
+        keys (dict): Keys shared by every instance
+
+    Returns:
+        dict: Keys to process keyed by instance name
+
+    Raises:
+        ValueError: If instances is not a non-empty list or dictionary
+    """
+    if isinstance(instances, list):
+        for instance in instances:
+            validate_instance_name(instance)
+        instance_keys = {instance: keys for instance in instances}
+    elif isinstance(instances, dict):
+        instance_keys = {}
+        for instance, own_keys in instances.items():
+            if own_keys is None:
+                own_keys = {}
+            if not isinstance(own_keys, dict):
+                raise ValueError(f"Keys for instance '{instance}' must be a dictionary")
+            instance_keys[instance] = {**keys, **own_keys}
+    else:
+        raise ValueError("Instances must be a list of names or a dictionary of names to keys")
+
+    if not instance_keys:
+        raise ValueError("Instances must not be empty")
+    for instance in instance_keys:
+        validate_instance_name(instance)
+    return instance_keys
+
+
+def validate_keys(keys: Any, validate_values: bool = True) -> None:
+    """
+    Validate configuration keys and values.
+
+    Args:
+        keys (dict): Dictionary of configuration keys and values to validate
+
+    Raises:
+        ValueError: If keys is not a dictionary or if any key/value is invalid
+    """
+    if not isinstance(keys, dict):
+        raise ValueError("Keys must be a dictionary")
+
+    for key, value in keys.items():
+        validate_key_name(key)
+        if validate_values and not isinstance(value, (str, int, float, bool)):
+            raise ValueError(
+                f"Invalid value type for key '{key}': must be string, number, or boolean"
+            )
+
+
+def get_file_path(role: str, base_path: str) -> str:
+    """
+    Get the configuration file path for a role.
+
+    Args:
+        role (str): Name of the role
+        base_path (str): Base directory path
+
+    Returns:
+        str: Full path to the configuration file
+
+    Raises:
+        ValueError: If role is not a string
+    """
+    if not isinstance(role, str):
+        raise ValueError("Role name must be a string")
+    if os.path.sep in role or (os.path.altsep and os.path.altsep in role):
+        raise ValueError("Role name must not contain path separators")
+    if role in ('.', '..') or role.strip() == '':
+        raise ValueError("Role name must be a non-empty name")
+    if not isinstance(base_path, str) or not base_path.strip():
+        raise ValueError("Base path must be a non-empty string")
+    if not os.path.isabs(base_path):
+        raise ValueError("Base path must be absolute")
+    return os.path.join(os.path.normpath(base_path), 'saltbox', f'{role}.ini')
+
+
+def load_existing_facts(file_path: str, instance: str) -> dict[str, str]:
+    """
+    Load existing facts from configuration file for a specific instance.
+
+    Args:
+        file_path (str): Path to the configuration file
+        instance (str): Name of the instance
+
+    Returns:
+        dict: Dictionary of existing facts for the instance
+
+    """
+    validate_instance_name(instance)
+    return section_facts(read_config(file_path), instance)
+
+
+def section_facts(config: configparser.ConfigParser, instance: str) -> dict[str, str]:
+    """
+    Return the stored facts of an instance from a parsed configuration.
+
+    Args:
+        config (ConfigParser): Parsed configuration
+        instance (str): Name of the instance
+
+    Returns:
+        dict: Stored facts, skipping keys saved as 'None'
+    """
+    existing_facts: dict[str, str] = {}
+
+    if config.has_section(instance):
+        for key, value in config._sections[instance].items():
+            if value != 'None':
+                existing_facts[key] = value
+
+    return existing_facts
+
+
+def merge_facts(
+    config: configparser.ConfigParser,
+    instance: str,
+    keys: dict[str, Any],
+    overwrite: bool = False
+) -> tuple[dict[str, str], bool]:
+    """
+    Merge keys into a parsed configuration for one instance.
+
+    Args:
+        config (ConfigParser): Parsed configuration, updated in place
+        instance (str): Name of the instance
+        keys (dict): Dictionary of keys and values to process
+        overwrite (bool): If True, overwrite existing values; if False, keep existing values
+
+    Returns:
+        tuple: (dict of final facts, bool indicating if the configuration changed)
+    """
+    existing_facts = section_facts(config, instance)
+    final_facts: dict[str, str] = {}
+    keys_to_save: dict[str, str] = {}
+
+    if overwrite:
+        final_facts.update(existing_facts)
+        final_facts.update({key: str(value) for key, value in keys.items()})
+        keys_to_save = {key: str(value) for key, value in keys.items()}
+    else:
+        final_facts.update({key: str(value) for key, value in keys.items()})
+        final_facts.update(existing_facts)
+        for key, value in keys.items():
+            if key not in existing_facts:
+                keys_to_save[key] = str(value)
+
+    if not keys_to_save:
+        return final_facts, False
+
+    changed = False
+
+    if not config.has_section(instance):
+        config.add_section(instance)
+        changed = True
+
+    for key, value in keys_to_save.items():
+        section_values = config._sections[instance]
+        if key not in section_values or section_values[key] != value:
+            config.set(instance, key, value)
+            changed = True
+
+    return final_facts, changed
+
+
+def parse_mode(mode: Any) -> int:
+    """
+    Parse and validate file mode.
+
+    Args:
+        mode (str): File mode in octal string format (e.g., '0640')
+
+    Returns:
+        int: Parsed mode as integer
+
+    Raises:
+        ValueError: If mode is invalid or improperly formatted
+    """
+    if not isinstance(mode, str):
+        raise ValueError("Mode must be a quoted string to comply with YAML best practices.")
+    mode = mode.strip()
+    if mode.startswith('0'):
+        try:
+            parsed_mode = int(mode, 8)
+        except ValueError:
+            raise ValueError(f"Invalid octal mode: {mode}")
+        if parsed_mode > 0o7777:
+            raise ValueError("Mode must not exceed '07777'.")
+        return parsed_mode
+    else:
+        raise ValueError("Mode must be a quoted octal number starting with '0' (e.g., '0640').")
+
+
+def get_current_identity() -> tuple[str, str]:
+    """
+    Get the current user and that user's primary group.
+
+    Returns:
+        tuple: Current user name and primary group name
+    """
+    current_user = pwd.getpwuid(os.geteuid())
+    current_group = grp.getgrgid(current_user.pw_gid)
+    return current_user.pw_name, current_group.gr_name
+
+
+def resolve_ownership(owner: str, group: str) -> tuple[int, int]:
+    """
+    Resolve owner and group names before making filesystem changes.
+    """
+    try:
+        uid = pwd.getpwnam(owner).pw_uid
+    except KeyError as error:
+        raise ValueError(f"User '{owner}' not found on the system") from error
+    try:
+        gid = grp.getgrnam(group).gr_gid
+    except KeyError as error:
+        raise ValueError(f"Group '{group}' not found on the system") from error
+    return uid, gid
@@ -0,0 +1,501 @@
+# -*- coding: utf-8 -*-
+
+"""Shared helpers for the role_var, docker_var and docker_vars lookup plugins."""
+
+from __future__ import annotations
+
+import copy
+import glob
+import json
+import os
+import time
+from collections import Counter, OrderedDict
+from types import CodeType
+from typing import Any
+
+try:
+    from ansible._internal._templating._jinja_bits import _TemplateCompileContext
+except ImportError:
+    _TemplateCompileContext = None
+
+from saltbox_constant_defaults import load_constant_defaults
+
+TRACE_FILE_ENV = 'SALTBOX_LOOKUP_TRACE_FILE'
+PROFILE_DIR_ENV = 'SALTBOX_LOOKUP_PROFILE_DIR'
+JSON_LIST_CACHE_SIZE = 256
+TEMPLATE_CACHE_SIZE = 512
+
+# Environment settings that change the code compiled from a template source.
+TEMPLATE_COMPILE_SETTINGS = (
+    'block_start_string',
+    'block_end_string',
+    'variable_start_string',
+    'variable_end_string',
+    'comment_start_string',
+    'comment_end_string',
+    'line_statement_prefix',
+    'line_comment_prefix',
+    'trim_blocks',
+    'lstrip_blocks',
+    'newline_sequence',
+    'keep_trailing_newline',
+    'optimized',
+    'autoescape',
+    'finalize',
+    'is_async',
+)
+
+# Cache hits and misses since the last profiled lookup call, keyed by
+# (cache name, 'hits' or 'misses').
+_cache_events: Counter[tuple[str, str]] = Counter()
+
+# Parsed JSON string lists keyed by their exact contents. A value of None
+# records a list that failed to convert so the failure is not re-parsed.
+_json_list_cache: OrderedDict[tuple[str, ...], dict[str, Any] | None] = OrderedDict()
+
+# Compiled Jinja code objects keyed by compiling environment, template source
+# and compile settings.
+_template_code_cache: OrderedDict[tuple[Any, ...], CodeType] = OrderedDict()
+_caching_environment_classes: dict[type, type] = {}
+_caching_environments: dict[tuple[Any, ...], Any] = {}
+
+# Repository root holding the role defaults folded by constant_default().
+_BASE_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# Returned by constant_default() when a value has to go through the templar.
+NOT_CONSTANT = object()
+
+
+class LookupTracer:
+    """
+    Verbosity-gated debug output for a lookup plugin.
+
+    Messages take %-style arguments and are only formatted when -vvv output
+    (or an equivalent log verbosity) is active, so large resolved values are
+    never stringified on normal runs.
+
+    When SALTBOX_LOOKUP_TRACE_FILE is set, every resolution is additionally
+    appended to that file as a single JSON line naming the variables that were
+    tried and the one that won. Resolved values are never written.
+    """
+
+    def __init__(self, name: str, display: Any) -> None:
+        self.name: str = name
+        self.display = display
+        self.trace_file: str | None = os.environ.get(TRACE_FILE_ENV) or None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether -vvv messages would be displayed or logged."""
+        verbosity = max(self.display.verbosity, getattr(self.display, 'log_verbosity', 0))
+        return verbosity >= 3
+
+    def vvv(self, message: str, *args: Any) -> None:
+        """Emit a -vvv message, formatting it only when it will be used."""
+        if not self.enabled:
+            return
+        if args:
+            message = message % args
+        self.display.vvv(f"[{self.name}] {message}")
+
+    def record(self, outcome: str, candidates: list[str], winner: str | None = None, **fields: Any) -> None:
+        """
+        Append a resolution record to the trace file, if one is configured.
+
+        Args:
+            outcome (str): How the lookup resolved ('variable', 'default', 'omit' or 'missing')
+            candidates (list): Variable names checked, in order
+            winner (str): Variable that provided the value, if any
+            **fields: Additional context such as the role, instance and suffix
+        """
+        if not self.trace_file:
+            return
+
+        entry = {
+            'lookup': self.name,
+            'outcome': outcome,
+            'winner': winner,
+            'candidates': candidates,
+            'pid': os.getpid(),
+            'time': round(time.time(), 6),
+        }
+        entry.update(fields)
+        line = json.dumps(entry, default=str, sort_keys=True) + '\n'
+
+        # A single O_APPEND write keeps lines from parallel forks intact.
+        try:
+            fd = os.open(self.trace_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, line.encode('utf-8'))
+            finally:
+                os.close(fd)
+        except OSError as error:
+            self.display.warning(f"[{self.name}] Unable to write lookup trace to '{self.trace_file}': {error}")
+            self.trace_file = None
+
+
+class LookupProfiler:
+    """
+    Per-call timing for a lookup plugin.
+
+    Profiling is active while SALTBOX_LOOKUP_PROFILE_DIR is set, which the
+    saltbox_lookup_profile callback does for the duration of a playbook. Each
+    profiled call appends one JSON line to a per-process file in that
+    directory, which the callback aggregates when the playbook ends. Times are
+    inclusive, so a lookup that triggers nested lookups also accounts for them.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name: str = name
+
+    @property
+    def directory(self) -> str | None:
+        return os.environ.get(PROFILE_DIR_ENV) or None
+
+    def start(self) -> float | None:
+        """Return a start timestamp, or None when profiling is disabled."""
+        if self.directory is None:
+            return None
+        return time.perf_counter()
+
+    def stop(self, started: float | None, role: str | None, suffix: str) -> None:
+        """
+        Record a finished lookup call started with start().
+
+        Args:
+            started (float): Value returned by start()
+            role (str): Role (or Docker variable prefix) the lookup resolved for
+            suffix (str): Variable suffix that was looked up
+        """
+        directory = self.directory
+        if started is None or directory is None:
+            return
+
+        cache = {f"{cache_name}_{kind}": count for (cache_name, kind), count in _cache_events.items()}
+        _cache_events.clear()
+        entry = {
+            'lookup': self.name,
+            'role': role or '',
+            'suffix': suffix,
+            'seconds': time.perf_counter() - started,
+            'cache': cache,
+        }
+        line = json.dumps(entry, sort_keys=True) + '\n'
+        try:
+            fd = os.open(
+                os.path.join(directory, f"lookups-{os.getpid()}.jsonl"),
+                os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+                0o600
+            )
+            try:
+                os.write(fd, line.encode('utf-8'))
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+
+
+def summarize_lookup_profile(directory: str, top: int = 25) -> dict[str, Any]:
+    """
+    Aggregate the records written by LookupProfiler into a report.
+
+    Args:
+        directory (str): Profile spool directory
+        top (int): Number of (role, suffix) pairs to include, slowest first
+
+    Returns:
+        dict: Per-lookup totals under 'lookups' and the slowest pairs under 'pairs'
+    """
+    lookups: dict[str, dict[str, Any]] = {}
+    pairs: dict[tuple[str, str, str], dict[str, Any]] = {}
+
+    for path in sorted(glob.glob(os.path.join(directory, 'lookups-*.jsonl'))):
+        with open(path, 'r', encoding='utf-8') as spool:
+            for line in spool:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                seconds = float(entry.get('seconds', 0.0))
+                totals = lookups.setdefault(entry['lookup'], {'calls': 0, 'seconds': 0.0, 'cache': Counter()})
+                totals['calls'] += 1
+                totals['seconds'] += seconds
+                totals['cache'].update(entry.get('cache', {}))
+
+                key = (entry['lookup'], entry.get('role', ''), entry.get('suffix', ''))
+                pair = pairs.setdefault(key, {
+                    'lookup': key[0],
+                    'role': key[1],
+                    'suffix': key[2],
+                    'calls': 0,
+                    'seconds': 0.0,
+                    'max_seconds': 0.0,
+                })
+                pair['calls'] += 1
+                pair['seconds'] += seconds
+                pair['max_seconds'] = max(pair['max_seconds'], seconds)
+
+    for totals in lookups.values():
+        totals['cache'] = dict(totals['cache'])
+
+    slowest = sorted(pairs.values(), key=lambda pair: pair['seconds'], reverse=True)
+    return {
+        'lookups': lookups,
+        'pairs': slowest[:top] if top > 0 else slowest,
+    }
+
+
+def is_json_string_list(value: Any) -> bool:
+    """
+    Check if value is a non-empty list of strings that look like JSON objects.
+
+    Entries are normally already trimmed, so the first and last characters are
+    checked directly and strip() is only used as a fallback.
+    """
+    if not isinstance(value, list) or not value:
+        return False
+
+    for item in value:
+        if not isinstance(item, str):
+            return False
+        if item[:1] == '{' and item[-1:] == '}':
+            continue
+        stripped = item.strip()
+        if not (stripped.startswith('{') and stripped.endswith('}')):
+            return False
+
+    return True
+
+
+def convert_json_string_list(json_list: list[str], tracer: LookupTracer) -> dict[str, Any] | None:
+    """
+    Convert a list of JSON object strings to a combined dictionary.
+
+    Results are cached by the tuple of strings, so converting the same label or
+    option list again only costs a hash lookup. Callers receive a deep copy of
+    the cached dictionary, so nested values can be changed without touching the
+    cache.
+
+    Args:
+        json_list (list): Strings previously accepted by is_json_string_list
+        tracer (LookupTracer): Tracer of the calling lookup, used for messages
+
+    Returns:
+        dict: Combined dictionary, or None if any entry could not be converted
+    """
+    key = tuple(json_list)
+    if key in _json_list_cache:
+        _cache_events[('json', 'hits')] += 1
+        _json_list_cache.move_to_end(key)
+        cached = _json_list_cache[key]
+        tracer.vvv("Reused cached conversion of %s JSON strings", len(key))
+        return copy.deepcopy(cached) if cached is not None else None
+
+    _cache_events[('json', 'misses')] += 1
+    combined_dict: dict[str, Any] | None = {}
+    for json_str in json_list:
+        try:
+            parsed = json.loads(json_str)
+        except json.JSONDecodeError as je:
+            tracer.display.warning(f"[{tracer.name}] Invalid JSON in: {json_str[:100]}... Error: {je}")
+            combined_dict = None
+            break
+        except (TypeError, AttributeError) as e:
+            tracer.display.warning(f"[{tracer.name}] Failed to process JSON string: {e}")
+            combined_dict = None
+            break
+        if not isinstance(parsed, dict):
+            tracer.display.warning(f"[{tracer.name}] JSON string parsed to non-dict: {parsed}")
+            combined_dict = None
+            break
+        combined_dict.update(parsed)
+
+    _json_list_cache[key] = combined_dict
+    if len(_json_list_cache) > JSON_LIST_CACHE_SIZE:
+        _json_list_cache.popitem(last=False)
+
+    if combined_dict is None:
+        return None
+    tracer.vvv("Converted JSON list to dict with %s keys using manual parsing", len(combined_dict))
+    return copy.deepcopy(combined_dict)
+
+
+def _caching_environment_class(base: type) -> type:
+    """
+    Return a subclass of a Jinja environment class whose compile() reuses code
+    objects from the shared template cache.
+
+    Entries are keyed by the id of the compiling environment, so a code object
+    is only reused by the environment that produced it, with the same filters,
+    tests and finalize. Overlays are compiled without the cache.
+    """
+    cls = _caching_environment_classes.get(base)
+    if cls is not None:
+        return cls
+
+    def compile(self, source, name=None, filename=None, raw=False, defer_init=False):
+        if raw or self.overlayed or not isinstance(source, str) or getattr(self, '_debuggable_template_source', False):
+            return base.compile(self, source, name, filename, raw, defer_init)
+
+        compile_context = _TemplateCompileContext.current(optional=True)
+        key = (
+            id(self),
+            str(source),
+            name,
+            filename,
+            defer_init,
+            bool(compile_context and compile_context.escape_backslashes),
+            tuple(getattr(self, setting, None) for setting in TEMPLATE_COMPILE_SETTINGS),
+        )
+        code = _template_code_cache.get(key)
+        if code is not None:
+            _cache_events[('template', 'hits')] += 1
+            _template_code_cache.move_to_end(key)
+            return code
+
+        _cache_events[('template', 'misses')] += 1
+        code = base.compile(self, source, name, filename, raw, defer_init)
+        _template_code_cache[key] = code
+        if len(_template_code_cache) > TEMPLATE_CACHE_SIZE:
+            _template_code_cache.popitem(last=False)
+        return code
+
+    cls = type(base.__name__, (base,), {
+        '__module__': base.__module__,
+        '__qualname__': base.__qualname__,
+        'compile': compile,
+        '_saltbox_template_cache': True,
+    })
+    _caching_environment_classes[base] = cls
+    return cls
+
+
+def _caching_environment(environment: Any, basedir: str) -> Any:
+    """
+    Return the private caching environment matching a templar's environment.
+
+    One is created per environment class, basedir and loader search path and
+    kept for the life of the process, so its id stays unique in the template
+    cache. Returns None if its settings differ from the templar's environment.
+    """
+    searchpath = tuple(getattr(environment.loader, 'searchpath', None) or ())
+    key = (type(environment), basedir, searchpath)
+    private = _caching_environments.get(key)
+    if private is None:
+        private = _caching_environment_class(type(environment))(ansible_basedir=basedir)
+        if searchpath:
+            private.loader.searchpath = list(searchpath)
+        _caching_environments[key] = private
+
+    for setting in TEMPLATE_COMPILE_SETTINGS:
+        if getattr(private, setting, None) != getattr(environment, setting, None):
+            return None
+    return private
+
+
+def cache_template_compilation(templar: Any) -> Any:
+    """
+    Return a templar that reuses compiled templates for identical sources.
+
+    Role defaults reach the lookups as the same raw strings on every call, and
+    the templar parses and compiles each of them again before rendering. The
+    returned templar is a copy sharing the variables of the one passed in, bound
+    to a private Jinja environment that keeps compiled code in an LRU keyed by
+    source, so repeat evaluations only render against the current variables.
+    Trust checks, lazy variables and omit handling stay with the templar. The
+    templar passed in and its environment are left untouched.
+
+    Relies on ansible-core templating internals (checked against 2.19 and
+    2.21); when they are not available the templar itself is returned.
+
+    Args:
+        templar: Templar of the calling lookup, with its variables already set
+
+    Returns:
+        Templar to use for templating during this lookup call
+    """
+    if _TemplateCompileContext is None:
+        return templar
+
+    engine = getattr(templar, '_engine', None)
+    environment = getattr(engine, 'environment', None)
+    if environment is None or not hasattr(engine, 'copy'):
+        return templar
+    if getattr(type(environment), '_saltbox_template_cache', False):
+        return templar
+
+    try:
+        private = _caching_environment(environment, engine.basedir)
+    except TypeError:
+        return templar
+    if private is None:
+        return templar
+
+    caching_engine = engine.copy()
+    caching_engine._environment = private
+    caching_templar = copy.copy(templar)
+    caching_templar._engine = caching_engine
+    return caching_templar
+
+
+def _identical(value: Any, source: Any) -> bool:
+    """Compare a variable with a loaded default, telling True apart from 1 and 1.0."""
+    if isinstance(source, str):
+        return isinstance(value, str) and value == source
+    if isinstance(source, bool) or source is None:
+        return value is source
+    if isinstance(source, (int, float)):
+        return not isinstance(value, bool) and isinstance(value, type(source)) and value == source
+    if isinstance(source, dict):
+        return (
+            isinstance(value, dict)
+            and len(value) == len(source)
+            and all(key in value and _identical(value[key], item) for key, item in source.items())
+        )
+    if isinstance(source, list):
+        return (
+            isinstance(value, list)
+            and len(value) == len(source)
+            and all(_identical(item, expected) for item, expected in zip(value, source))
+        )
+    return False
+
+
+def constant_default(var_name: str, raw_value: Any, variables: dict[str, Any]) -> Any:
+    """
+    Return the precomputed value of a constant role default.
+
+    Role defaults without template syntax, or built only from literal text and
+    references to such defaults, are folded once per process from the
+    repository's defaults files. A folded value is only used while the variable
+    and every default it was folded from still hold the exact values written
+    in those files, so inventory or play overrides always go through the
+    templar.
+
+    Args:
+        var_name (str): Name of the variable being resolved
+        raw_value: Untemplated value of the variable
+        variables (dict): Variables available to the lookup
+
+    Returns:
+        The value templating raw_value would produce, or NOT_CONSTANT
+    """
+    entry = load_constant_defaults(_BASE_PATH).get(var_name)
+    if entry is None:
+        _cache_events[('constant', 'misses')] += 1
+        return NOT_CONSTANT
+
+    source, value, dependencies = entry
+    if not _identical(raw_value, source) or not all(
+        _identical(variables.get(name, NOT_CONSTANT), dependency)
+        for name, dependency in dependencies.items()
+    ):
+        _cache_events[('constant', 'misses')] += 1
+        return NOT_CONSTANT
+
+    _cache_events[('constant', 'hits')] += 1
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    # Literal scalars template to themselves, keeping the variable's own object.
+    return raw_value if value is source else value
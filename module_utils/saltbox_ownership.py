@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+"""Parallel recursive ownership changes for Saltbox modules."""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Collection, Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+DEFAULT_WORKERS = 8
+
+
+def chown_path(path: str, uid: int, gid: int) -> bool:
+    """
+    Apply owner and group to a single path without following a symbolic link.
+
+    Returns:
+        bool: True if the ownership was changed
+    """
+    path_stat = os.lstat(path)
+    if (uid == -1 or path_stat.st_uid == uid) and (gid == -1 or path_stat.st_gid == gid):
+        return False
+    os.lchown(path, uid, gid)
+    return True
+
+
+def chown_directory_entries(
+    path: str,
+    uid: int,
+    gid: int,
+    exclude: Collection[str] = ()
+) -> tuple[list[str], int, int]:
+    """
+    Fix the ownership of the entries of one directory.
+
+    Entries come from os.scandir, so each costs a single lstat, and os.lchown
+    is only called for entries whose owner or group differ. Symbolic links
+    are changed themselves and never followed. Entries, or the directory
+    itself, removed while being processed are skipped.
+
+    Args:
+        path (str): Directory whose entries are processed
+        uid (int): Wanted owner, or -1 to leave owners unchanged
+        gid (int): Wanted group, or -1 to leave groups unchanged
+        exclude (collection): Normalized paths skipped together with their contents
+
+    Returns:
+        tuple: (subdirectories to descend into, entries scanned, entries changed)
+    """
+    subdirectories: list[str] = []
+    scanned = 0
+    changed = 0
+
+    try:
+        entries = os.scandir(path)
+    except FileNotFoundError:
+        return subdirectories, scanned, changed
+
+    with entries:
+        for entry in entries:
+            if exclude and entry.path in exclude:
+                continue
+            try:
+                entry_stat = entry.stat(follow_symlinks=False)
+                if (uid != -1 and entry_stat.st_uid != uid) or (gid != -1 and entry_stat.st_gid != gid):
+                    os.lchown(entry.path, uid, gid)
+                    changed += 1
+            except FileNotFoundError:
+                continue
+            scanned += 1
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append(entry.path)
+
+    return subdirectories, scanned, changed
+
+
+def chown_tree(path: str, uid: int, gid: int, workers: int = DEFAULT_WORKERS) -> tuple[int, int]:
+    """
+    Recursively apply owner and group to everything below path.
+
+    The path itself is not changed. See chown_trees.
+
+    Returns:
+        tuple: (entries scanned, entries changed)
+    """
+    return chown_trees([path], uid, gid, workers)
+
+
+def chown_trees(
+    paths: Iterable[str],
+    uid: int,
+    gid: int,
+    workers: int = DEFAULT_WORKERS,
+    exclude: Collection[str] = ()
+) -> tuple[int, int]:
+    """
+    Recursively apply owner and group to everything below several paths.
+
+    Every directory is a unit of work for one shared thread pool, so all
+    trees and their independent subtrees are processed in parallel while the
+    filesystem calls release the GIL. The paths themselves are not changed.
+    Any error other than an entry disappearing stops the walk and is raised.
+
+    Args:
+        paths (iterable): Roots of the trees
+        uid (int): Wanted owner, or -1 to leave owners unchanged
+        gid (int): Wanted group, or -1 to leave groups unchanged
+        workers (int): Number of threads
+        exclude (collection): Normalized paths skipped together with their contents
+
+    Returns:
+        tuple: (entries scanned, entries changed)
+    """
+    scanned = 0
+    changed = 0
+    if uid == -1 and gid == -1:
+        return scanned, changed
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending: set[Future[tuple[list[str], int, int]]] = {
+            executor.submit(chown_directory_entries, path, uid, gid, exclude) for path in paths
+        }
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    subdirectories, directory_scanned, directory_changed = future.result()
+                    scanned += directory_scanned
+                    changed += directory_changed
+                    for subdirectory in subdirectories:
+                        pending.add(executor.submit(chown_directory_entries, subdirectory, uid, gid, exclude))
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+    return scanned, changed
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+
+"""Public suffix parsing for the tld_parse module and filter."""
+
+from __future__ import annotations
+
+import importlib.util
+import marshal
+import os
+import sys
+import tempfile
+from typing import Any
+from urllib.parse import urlsplit
+
+CACHE_FORMAT = 2
+CACHE_FILE_NAME = 'tld_suffix_trie.marshal'
+
+# Flags of a trie node.
+LEAF = 1
+PRIVATE = 2
+HAS_CHILDREN = 4
+
+# The suffix trie as (flags by path, exception label by path). A path is the
+# reversed labels of a node joined by dots, for example 'uk.co' for co.uk,
+# and the root is ''. Flat string-keyed dicts load from marshal far faster
+# than a nested structure.
+_trie: tuple[dict[str, int], dict[str, str]] | None = None
+
+
+def source_path() -> str:
+    """
+    Return the public suffix list bundled with the tld library.
+
+    The package is located without importing it, which would cost more than
+    loading the cached trie.
+
+    Raises:
+        ImportError: If the tld library is not installed
+    """
+    spec = importlib.util.find_spec('tld')
+    if spec is None or not spec.submodule_search_locations:
+        raise ImportError("No module named 'tld'")
+    return os.path.join(list(spec.submodule_search_locations)[0], 'res', 'effective_tld_names.dat.txt')
+
+
+def default_cache_path() -> str:
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'saltbox', CACHE_FILE_NAME)
+
+
+def build_trie(path: str) -> tuple[dict[str, int], dict[str, str]]:
+    """
+    Build the suffix trie from a public suffix list file.
+
+    Rules are added exactly like the tld library's own Trie, including its
+    handling of wildcard and exception rules, so lookups give the same
+    results.
+    """
+    nodes: dict[str, int] = {'': 0}
+    exceptions: dict[str, str] = {}
+    private_section = False
+
+    with open(path, 'r', encoding='utf-8') as source:
+        for line in source:
+            if '===BEGIN PRIVATE DOMAINS===' in line:
+                private_section = True
+            # Puny code TLD names
+            if '// xn--' in line:
+                line = line.split()[1]
+            if line[0] in ('/', '\n'):
+                continue
+
+            node = ''
+            for part in reversed(line.strip().split('.')):
+                if part.startswith('!'):
+                    exceptions[node] = part[1:]
+                    break
+                nodes[node] |= HAS_CHILDREN
+                node = f"{node}.{part}" if node else part
+                nodes.setdefault(node, 0)
+            nodes[node] |= LEAF | (PRIVATE if private_section else 0)
+
+    return nodes, exceptions
+
+
+def _cache_key(path: str) -> tuple[Any, ...]:
+    source_stat = os.stat(path)
+    return (CACHE_FORMAT, marshal.version, sys.version_info[:2], path, source_stat.st_mtime_ns, source_stat.st_size)
+
+
+def load_trie(cache_path: str | None = None) -> tuple[dict[str, int], dict[str, str]]:
+    """
+    Return the suffix trie, building it once per process.
+
+    The built trie is stored with marshal next to a key of the source file's
+    path, modification time and size, so later processes load it without
+    parsing the list. A stale, unreadable or unwritable cache only means the
+    list is parsed again.
+
+    Raises:
+        ImportError: If the tld library is not installed
+    """
+    global _trie
+    if _trie is not None:
+        return _trie
+
+    path = source_path()
+    key = _cache_key(path)
+    cache_path = cache_path or default_cache_path()
+
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            cached_key, trie = marshal.load(cache_file)
+        if cached_key == key:
+            _trie = trie
+            return trie
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    trie = build_trie(path)
+    try:
+        directory = os.path.dirname(cache_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tld_suffix_trie.')
+        try:
+            with os.fdopen(fd, 'wb') as cache_file:
+                marshal.dump((key, trie), cache_file)
+            os.replace(temp_path, cache_path)
+        except OSError:
+            os.unlink(temp_path)
+            raise
+    except OSError:
+        pass
+
+    _trie = trie
+    return trie
+
+
+def build_hostname(url: str, record: str = '') -> str:
+    """
+    Return the hostname to parse from a bare domain or URL.
+
+    Schemes, ports, paths, queries, and fragments are discarded because only
+    the hostname is relevant. A record is prepended when given.
+
+    Raises:
+        ValueError: If the URL is empty or has no hostname
+    """
+    normalized_url = url.strip()
+    if not normalized_url:
+        raise ValueError("url must not be empty")
+
+    parsed_url = urlsplit(normalized_url if '://' in normalized_url else f"//{normalized_url}")
+    hostname = parsed_url.hostname
+    if hostname and hostname.endswith('.'):
+        hostname = hostname[:-1]
+    if not hostname:
+        raise ValueError(f"Could not extract a hostname from '{url}'")
+
+    normalized_record = record.strip()
+    if normalized_record.endswith('.'):
+        normalized_record = normalized_record[:-1]
+    if normalized_record:
+        hostname = f"{normalized_record}.{hostname}"
+
+    return hostname
+
+
+def parse_hostname(hostname: str, trie: tuple[dict[str, int], dict[str, str]] | None = None) -> dict[str, str]:
+    """
+    Split a hostname into its public suffix, domain and subdomain.
+
+    Mirrors tld.get_tld(as_object=True) with public and private suffixes.
+
+    Returns:
+        dict: fld, subdomain, record ('@' for the registered domain itself),
+              tld and domain
+
+    Raises:
+        ValueError: If no public suffix matches
+    """
+    nodes, exceptions = trie if trie is not None else load_trie()
+    domain_name = hostname.lower().rstrip('.')
+    domain_parts = domain_name.split('.')
+
+    node = ''
+    current_length = 0
+    tld_length = 0
+    matched = False
+    for part in reversed(domain_parts):
+        if not nodes[node] & HAS_CHILDREN or part == exceptions.get(node):
+            break
+        prefix = f"{node}." if node else ''
+        child = prefix + part
+        if child not in nodes:
+            child = f"{prefix}*"
+            if child not in nodes:
+                break
+        current_length += 1
+        node = child
+        if nodes[node] & LEAF:
+            tld_length = current_length
+            matched = True
+
+    if not matched:
+        raise ValueError(f"Domain {domain_name} didn't match any existing TLD name!")
+
+    if len(domain_parts) == tld_length:
+        subdomain = ''
+        domain = tld = domain_name
+        fld = tld
+    else:
+        boundary = max(1, len(domain_parts) - tld_length)
+        subdomain = '.'.join(domain_parts[:boundary - 1])
+        domain = domain_parts[boundary - 1]
+        tld = '.'.join(domain_parts[boundary:])
+        fld = f"{domain}.{tld}"
+
+    return {
+        'fld': fld,
+        'subdomain': subdomain,
+        'record': subdomain if subdomain else '@',
+        'tld': tld,
+        'domain': domain,
+    }
+
+
+def parse_url(url: str, record: str = '') -> dict[str, str]:
+    """
+    Parse a bare domain or URL, with an optional record prepended.
+
+    Raises:
+        ValueError: If the URL has no hostname or no public suffix matches
+        ImportError: If the tld library is not installed
+    """
+    return parse_hostname(build_hostname(url, record))
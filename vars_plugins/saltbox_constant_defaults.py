@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+DOCUMENTATION = """
+    name: saltbox_constant_defaults
+    short_description: Folds constant role defaults before tasks run
+    description:
+      - Finds the role defaults that are literals, or only reference other literal defaults, and computes their values.
+      - Runs in the controller process so forked workers inherit the table used by role_var, docker_var and docker_vars.
+      - Does not provide any variables.
+    author: salty
+"""
+
+import os
+import sys
+from typing import Any
+
+from ansible.plugins.vars import BaseVarsPlugin
+
+_MODULE_UTILS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'module_utils')
+if _MODULE_UTILS_PATH not in sys.path:
+    sys.path.append(_MODULE_UTILS_PATH)
+
+from saltbox_constant_defaults import load_constant_defaults  # noqa: E402
+
+
+class VarsModule(BaseVarsPlugin):
+
+    REQUIRES_ENABLED = False
+
+    def get_vars(self, loader: Any, path: str, entities: Any, cache: bool = True) -> dict[str, Any]:
+        super().get_vars(loader, path, entities)
+        load_constant_defaults(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+        return {}